@@ -1,7 +1,7 @@
 """Top-level package for the Research Agent.
 
 This module intentionally keeps imports minimal so importing `app` does not
-pull in heavy optional dependencies (LLM clients, langgraph, etc.).
+pull in heavy optional dependencies (LLM clients, etc.).
 
 Modules should import their own dependencies directly (for example,
 `from app.research_agent import graph` where needed) to avoid import-time
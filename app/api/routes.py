@@ -1,8 +1,11 @@
 """
 API routes for research agent.
 """
-from fastapi import APIRouter, BackgroundTasks, HTTPException, status
-from typing import Dict, Any
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Dict, Any, Optional
+import asyncio
+import time
 import uuid
 from datetime import datetime
 
@@ -13,106 +16,46 @@ from app.models.schemas import (
     HealthResponse,
     ResearchStatus
 )
+from app.config import settings
+from app.services.job_events import job_events
+from app.services.job_store import job_store, ns_to_datetime, timestamp_ns
+from app.workers.tasks import process_research_job
 # Import research agent components lazily inside functions to avoid heavy
-# import-time dependencies (langgraph/langsmith) which can cause startup
+# import-time dependencies (langchain/langsmith) which can cause startup
 # failures when optional packages have incompatible versions.
 from app.utils.logger import app_logger
 
 # Router instance
 router = APIRouter()
 
-# In-memory job storage (use database in production)
-jobs_db: Dict[str, Dict[str, Any]] = {}
+# Job states after which a job no longer changes
+TERMINAL_STATUSES = (ResearchStatus.COMPLETED, ResearchStatus.FAILED)
 
 
-async def process_research_job(job_id: str, state: Dict[str, Any]):
+def build_job_status(job: Dict[str, Any]) -> JobStatusResponse:
     """
-    Background task to process research job.
+    Build the status view of a stored job.
     
     Args:
-        job_id: Job identifier
-        state: Initial research state
-    """
-    try:
-        app_logger.info(f"Starting research job {job_id}")
+        job: Job dictionary from the job store
         
-        # Update job status
-        jobs_db[job_id]["status"] = ResearchStatus.PROCESSING
-        
-        # Execute research workflow (lazy import)
-        from app.research_agent.graph import research_graph
-
-        result = research_graph.invoke(state)
-
-        # Create Google Doc (lazy import)
-        try:
-            from app.services.google_docs import google_docs_service
-        except Exception:
-            google_docs_service = None
-
-        if google_docs_service:
-            try:
-                doc_result = google_docs_service.create_document(
-                    title=result.get("report_title", f"Research Report - {job_id}"),
-                    content=result.get("report_markdown", "")
-                )
-            except Exception:
-                doc_result = None
-        else:
-            doc_result = None
-
-        if doc_result:
-            result["google_doc_url"] = doc_result.get("url")
-
-            # Trigger n8n workflow (lazy import)
-            try:
-                from app.services.n8n_client import n8n_client
-            except Exception:
-                n8n_client = None
-
-            if n8n_client:
-                try:
-                    n8n_response = await n8n_client.trigger_workflow(
-                        job_id=job_id,
-                        google_doc_url=doc_result.get("url"),
-                        report_data={
-                            "title": result.get("report_title", ""),
-                            "query": result.get("query", ""),
-                            "created_at": str(result.get("started_at", "")),
-                            "user_id": result.get("user_id", ""),
-                            "citations": result.get("citations", []),
-                            "summary": result.get("executive_summary", "")
-                        }
-                    )
-                except Exception:
-                    n8n_response = None
-
-                result["n8n_response"] = n8n_response
-        
-        # Update job with results
-        jobs_db[job_id].update({
-            "status": ResearchStatus.COMPLETED,
-            "completed_at": datetime.now(),
-            "google_doc_url": result.get("google_doc_url"),
-            "summary": result.get("executive_summary", ""),
-            "report_data": result
-        })
-        
-        app_logger.info(f"Research job {job_id} completed successfully")
-        
-    except Exception as e:
-        app_logger.error(f"Error processing job {job_id}: {str(e)}")
-        jobs_db[job_id].update({
-            "status": ResearchStatus.FAILED,
-            "completed_at": datetime.now(),
-            "error_message": str(e)
-        })
+    Returns:
+        Job status information
+    """
+    return JobStatusResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        progress=job.get("report_data", {}).get("current_step") if job.get("report_data") else None,
+        google_doc_url=job.get("google_doc_url"),
+        error_message=job.get("error_message")
+    )
 
 
 @router.post("/research", response_model=ResearchResponse, status_code=status.HTTP_202_ACCEPTED)
 async def create_research_job(
     request: ResearchRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    raw_request: Request
 ):
     """
     Submit a new research query.
@@ -120,50 +63,53 @@ async def create_research_job(
     Args:
         request: Research request
         background_tasks: FastAPI background tasks
+        raw_request: Underlying HTTP request (gives access to app state)
         
     Returns:
         Research job response with job ID
     """
-    try:
-        # Generate job ID
-        job_id = str(uuid.uuid4())
-        
-        app_logger.info(f"Creating research job {job_id} for query: {request.query}")
-        
-        # Create initial state (imported lazily)
-        from app.research_agent.state import create_initial_state
+    # Failures here (database, queue) are logged once, with traceback, by
+    # the application's general exception handler
+    
+    # Generate job ID (dash-less UUID: shorter key, still a valid
+    # Postgres uuid)
+    job_id = uuid.uuid4().hex
+    
+    app_logger.info("Creating research job {} for query: {}", job_id, request.query)
+    
+    # Create initial state (imported lazily)
+    from app.research_agent.state import create_initial_state
 
-        initial_state = create_initial_state(
-            query=request.query,
-            job_id=job_id,
-            user_id=request.user_id,
-            max_results=request.max_results,
-            include_citations=request.include_citations
-        )
-        
-        # Store job
-        jobs_db[job_id] = {
-            "job_id": job_id,
-            "status": ResearchStatus.PENDING,
-            "query": request.query,
-            "created_at": datetime.now(),
-            "completed_at": None,
-            "google_doc_url": None,
-            "summary": None,
-            "error_message": None
-        }
-        
-        # Add to background tasks
+    initial_state = create_initial_state(
+        query=request.query,
+        job_id=job_id,
+        user_id=request.user_id,
+        max_results=request.max_results,
+        include_citations=request.include_citations
+    )
+    
+    # Store job
+    job = {
+        "job_id": job_id,
+        "status": ResearchStatus.PENDING,
+        "query": request.query,
+        "created_at_ns": timestamp_ns(),
+        "completed_at_ns": None,
+        "google_doc_url": None,
+        "summary": None,
+        "error_message": None
+    }
+    await job_store.create(job)
+    
+    # Hand the job to the ARQ workers, or run it in-process when no
+    # queue is configured
+    arq_pool = getattr(raw_request.app.state, "arq", None)
+    if arq_pool is not None:
+        await arq_pool.enqueue_job("run_research", job_id, initial_state, _job_id=job_id)
+    else:
         background_tasks.add_task(process_research_job, job_id, initial_state)
-        
-        return ResearchResponse(**jobs_db[job_id])
-        
-    except Exception as e:
-        app_logger.error(f"Error creating research job: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create research job: {str(e)}"
-        )
+    
+    return ResearchResponse(**job, created_at=ns_to_datetime(job["created_at_ns"]))
 
 
 @router.get("/research/{job_id}", response_model=ResearchResponse)
@@ -177,40 +123,133 @@ async def get_research_job(job_id: str):
     Returns:
         Research job details
     """
-    if job_id not in jobs_db:
+    job = await job_store.get(job_id)
+    if job is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Job {job_id} not found"
         )
     
-    return ResearchResponse(**jobs_db[job_id])
+    return ResearchResponse(**job)
 
 
 @router.get("/research/{job_id}/status", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
+async def get_job_status(
+    job_id: str,
+    response: Response,
+    wait: float = 0,
+    if_none_match: Optional[str] = Header(None)
+):
     """
     Get research job status only.
     
+    With `wait` set, the request long-polls: it is held open for up to
+    `wait` seconds (capped by the server) until the job status changes.
+    Clients can send the status they already know in `If-None-Match`;
+    the request only blocks while that status is still current.
+    
     Args:
         job_id: Job identifier
+        response: Outgoing response (used to set the ETag header)
+        wait: Seconds to wait for a status change before returning
+        if_none_match: Status the client already has
         
     Returns:
         Job status information
     """
-    if job_id not in jobs_db:
+    # Subscribe before reading so no status change can slip in between
+    queue = job_events.subscribe(job_id)
+    try:
+        job = await job_store.get(job_id)
+        if job is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Job {job_id} not found"
+            )
+        
+        known_status = ResearchStatus(job["status"])
+        if if_none_match is not None and if_none_match.strip('"') != known_status.value:
+            wait = 0
+        
+        deadline = time.monotonic() + min(max(wait, 0), settings.long_poll_max_seconds)
+        while known_status not in TERMINAL_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Wake up on in-process events; the periodic re-read also picks
+            # up updates written by other workers.
+            try:
+                await asyncio.wait_for(
+                    queue.get(),
+                    timeout=min(remaining, settings.job_events_refresh_seconds)
+                )
+            except asyncio.TimeoutError:
+                pass
+            job = await job_store.get(job_id) or job
+            if ResearchStatus(job["status"]) != known_status:
+                break
+    finally:
+        job_events.unsubscribe(job_id, queue)
+    
+    job_status = build_job_status(job)
+    response.headers["ETag"] = f'"{job_status.status.value}"'
+    return job_status
+
+
+@router.get("/research/{job_id}/events")
+async def stream_job_events(job_id: str, raw_request: Request):
+    """
+    Stream job status changes as server-sent events.
+    
+    An event is sent with the current status on connect and after every
+    status change; the stream closes once the job completes or fails.
+    
+    Args:
+        job_id: Job identifier
+        raw_request: Underlying HTTP request (used to detect disconnects)
+        
+    Returns:
+        text/event-stream response
+    """
+    # Subscribe before reading so no status change can slip in between
+    queue = job_events.subscribe(job_id)
+    job = await job_store.get(job_id)
+    if job is None:
+        job_events.unsubscribe(job_id, queue)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Job {job_id} not found"
         )
     
-    job = jobs_db[job_id]
+    async def event_stream():
+        current = job
+        last_payload = None
+        try:
+            while True:
+                job_status = build_job_status(current)
+                payload = job_status.model_dump_json()
+                if payload != last_payload:
+                    yield f"data: {payload}\n\n"
+                    last_payload = payload
+                
+                if job_status.status in TERMINAL_STATUSES or await raw_request.is_disconnected():
+                    break
+                
+                # Wake up on in-process events; the periodic re-read also
+                # picks up updates written by other workers.
+                try:
+                    await asyncio.wait_for(queue.get(), timeout=settings.job_events_refresh_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                
+                current = await job_store.get(job_id) or current
+        finally:
+            job_events.unsubscribe(job_id, queue)
     
-    return JobStatusResponse(
-        job_id=job["job_id"],
-        status=job["status"],
-        progress=job.get("report_data", {}).get("current_step") if job.get("report_data") else None,
-        google_doc_url=job.get("google_doc_url"),
-        error_message=job.get("error_message")
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
@@ -224,7 +263,8 @@ async def health_check():
     """
     # Lazy-check optional services
     try:
-        from app.services.google_docs import google_docs_service
+        from app.services.google_docs import get_google_docs_service
+        google_docs_service = await asyncio.to_thread(get_google_docs_service)
         google_docs_ok = getattr(google_docs_service, "docs_service", None) is not None
     except Exception:
         google_docs_ok = False
@@ -248,10 +288,26 @@ async def health_check():
     )
 
 
+@router.get("/metrics", response_model=Dict[str, Any])
+async def metrics():
+    """
+    Runtime cache metrics.
+    
+    Returns:
+        LLM response cache hits, misses and size
+    """
+    from app.services.llm_cache import llm_response_cache
+    
+    return {"llm_cache": llm_response_cache.snapshot()}
+
+
 @router.get("/jobs", response_model=Dict[str, Any])
-async def list_jobs(limit: int = 10, offset: int = 0):
+async def list_jobs(limit: int = Query(10, ge=1, le=100), offset: int = Query(0, ge=0)):
     """
-    List all research jobs.
+    List research jobs, newest first.
+    
+    Pagination happens in the job store, and job summaries are returned
+    without the full report data.
     
     Args:
         limit: Maximum number of jobs to return
@@ -260,18 +316,13 @@ async def list_jobs(limit: int = 10, offset: int = 0):
     Returns:
         List of jobs
     """
-    jobs_list = list(jobs_db.values())
-    total = len(jobs_list)
-    
-    # Sort by created_at desc
-    jobs_list.sort(key=lambda x: x["created_at"], reverse=True)
-    
-    # Paginate
-    paginated_jobs = jobs_list[offset:offset + limit]
+    total, paginated_jobs = await job_store.list_jobs(limit, offset)
     
-    return {
+    # Job rows are produced internally, so skip response-model validation
+    # and let orjson encode them (datetimes and enums included) directly
+    return ORJSONResponse({
         "total": total,
         "limit": limit,
         "offset": offset,
         "jobs": paginated_jobs
-    }
\ No newline at end of file
+    })
\ No newline at end of file
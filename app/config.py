@@ -2,8 +2,7 @@
 Configuration management for the research agent application.
 """
 from pydantic_settings import BaseSettings
-from typing import List
-from functools import lru_cache
+from typing import List, Literal
 
 
 class Settings(BaseSettings):
@@ -13,6 +12,8 @@ class Settings(BaseSettings):
     app_name: str = "LangChain Research Agent"
     app_env: str = "development"
     debug: bool = True
+    # Return exception messages in 500 responses (never enable in production)
+    expose_error_details: bool = False
     host: str = "0.0.0.0"
     port: int = 8000
     
@@ -20,6 +21,28 @@ class Settings(BaseSettings):
     openai_api_key: str
     openai_model: str = "gpt-4-turbo-preview"
     
+    # Self-hosted OpenAI-compatible endpoint (e.g. vLLM serving a quantized
+    # model); empty uses api.openai.com
+    llm_base_url: str = ""
+    llm_quantization: Literal["fp16", "fp8", "int8"] = "fp16"
+    
+    # Sampling temperature; at 0, responses are cached in memory and in
+    # llm_cache_path (a SQLite file; empty keeps the cache in memory only)
+    llm_temperature: float = 0.3
+    llm_cache_path: str = ""
+    
+    # LLM micro-batching (prompts arriving within the window share a batch)
+    llm_batch_window_ms: int = 20
+    llm_batch_max_size: int = 16
+    
+    # In-memory cache of repeated LLMService prompts (default/zero temperature)
+    llm_response_cache_max_size: int = 1024
+    llm_response_cache_ttl_seconds: int = 3600
+    
+    # Allow offline summarization through the OpenAI Batch API (half price,
+    # results within 24h)
+    allow_batch_api: bool = False
+    
     # LangSmith
     langchain_tracing_v2: bool = True
     langchain_endpoint: str = "https://api.smith.langchain.com"
@@ -34,31 +57,59 @@ class Settings(BaseSettings):
     n8n_webhook_url: str = ""
     n8n_api_key: str = ""
     
-    # Database
+    # Outgoing HTTP connection pool
+    http_max_connections: int = 100
+    http_max_connections_per_host: int = 50
+    
+    # Database (a postgresql:// URL enables the persistent job store)
     database_url: str = "sqlite:///./research_agent.db"
+    db_pool_min_size: int = 4
+    db_pool_max_size: int = 20
+    
+    # In-memory job store (used without PostgreSQL): job status and the
+    # much larger report data expire separately
+    job_cache_max_size: int = 100_000
+    job_cache_ttl_seconds: int = 86400
+    report_cache_max_size: int = 1_000
+    report_cache_ttl_seconds: int = 3600
+    
+    # Seconds a finished research result is reused for identical queries
+    research_dedup_ttl_seconds: int = 300
+    
+    # Task queue (a redis:// URL moves research jobs to ARQ workers)
+    redis_url: str = ""
+    arq_max_jobs: int = 10
+    arq_job_timeout: int = 900
     
     # Security
     api_secret_key: str = "your-secret-key-change-in-production"
     cors_origins: List[str] = ["http://localhost:3000", "http://localhost:8000"]
     
+    # Job status streaming (seconds between store re-reads / keep-alives)
+    job_events_refresh_seconds: float = 5.0
+    long_poll_max_seconds: float = 25.0
+    
     # Rate Limiting
     max_requests_per_minute: int = 10
     
+    # Concurrency limits (research jobs, LLM calls, web searches)
+    max_concurrent_jobs: int = 4
+    max_concurrent_llm_calls: int = 8
+    max_concurrent_searches: int = 4
+    
     # Research Settings
     max_search_results: int = 10
     max_content_length: int = 50000
+    search_cache_max_size: int = 1024
+    search_cache_ttl_seconds: int = 600
     citation_style: str = "APA"
     
     class Config:
         env_file = ".env"
         case_sensitive = False
-
-
-@lru_cache()
-def get_settings() -> Settings:
-    """Get cached settings instance."""
-    return Settings()
+        # Settings are read once at startup; writes are a bug
+        frozen = True
 
 
 # Global settings instance
-settings = get_settings()
\ No newline at end of file
+settings = Settings()
\ No newline at end of file
@@ -2,12 +2,18 @@
 Main FastAPI application.
 """
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 
 from app.config import settings
-from app.api.routes import router
+from app.api.routes import router, health_check
+from app.models.schemas import HealthResponse
+from app.services.job_store import job_store, create_pool, is_postgres_url
+from app.services.n8n_client import n8n_client, create_http_session
+from app.workers.tasks import close_research_clients, warm_up_research_clients
+from app.utils.cors import FastCORSMiddleware
 from app.utils.logger import app_logger, setup_logger
 from app.utils.error_handlers import (
     validation_exception_handler,
@@ -27,26 +33,77 @@ async def lifespan(app: FastAPI):
     app_logger.info("Starting Research Agent application")
     app_logger.info(f"Environment: {settings.app_env}")
     app_logger.info(f"LLM Model: {settings.openai_model}")
+    if settings.llm_base_url:
+        app_logger.info(
+            f"LLM endpoint: {settings.llm_base_url} ({settings.llm_quantization} weights)"
+        )
+    
+    # Persistent job store
+    app.state.pool = None
+    if is_postgres_url(settings.database_url):
+        app.state.pool = await create_pool(
+            settings.database_url,
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size
+        )
+        await job_store.attach(app.state.pool)
+    else:
+        app_logger.warning("No PostgreSQL database configured; jobs are kept in memory")
+    purge_task = asyncio.create_task(job_store.purge_loop())
+    
+    # Shared HTTP session for outgoing webhook calls
+    app.state.http = create_http_session()
+    n8n_client.session = app.state.http
+    warm_up_task = asyncio.create_task(n8n_client.warm_up())
+    
+    # Job queue for ARQ workers
+    app.state.arq = None
+    if settings.redis_url:
+        from arq import create_pool as create_arq_pool
+        from arq.connections import RedisSettings
+        
+        app.state.arq = await create_arq_pool(RedisSettings.from_dsn(settings.redis_url))
+        app_logger.info("Research jobs will be executed by ARQ workers")
+        llm_warm_up_task = None
+    else:
+        # Jobs run in this process, so its LLM client serves them
+        llm_warm_up_task = asyncio.create_task(warm_up_research_clients())
     
     yield
     
     # Shutdown
     app_logger.info("Shutting down Research Agent application")
+    purge_task.cancel()
+    warm_up_task.cancel()
+    if llm_warm_up_task is not None:
+        llm_warm_up_task.cancel()
+    if app.state.arq is not None:
+        await app.state.arq.close()
+    # Background webhook retries still use the shared session
+    await n8n_client.close()
+    n8n_client.session = None
+    await app.state.http.close()
+    await close_research_clients()
+    if app.state.pool is not None:
+        job_store.detach()
+        await app.state.pool.close()
 
 
 # Create FastAPI application
 app = FastAPI(
     title=settings.app_name,
-    description="Autonomous research agent with LangGraph, Google Docs, and n8n integration",
+    description="Autonomous research agent with Google Docs and n8n integration",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
-# CORS middleware
+# CORS middleware (internal endpoints are never called cross-origin)
 app.add_middleware(
-    CORSMiddleware,
+    FastCORSMiddleware,
+    skip_prefixes=("/internal/",),
     allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
@@ -60,6 +117,16 @@ app.add_exception_handler(Exception, general_exception_handler)
 # Include routers
 app.include_router(router, prefix="/api/v1", tags=["Research"])
 
+# Internal endpoints for load balancers and orchestrator probes
+internal_app = FastAPI(
+    docs_url=None,
+    redoc_url=None,
+    openapi_url=None,
+    default_response_class=ORJSONResponse
+)
+internal_app.add_api_route("/health", health_check, response_model=HealthResponse)
+app.mount("/internal", internal_app)
+
 
 @app.get("/")
 async def root():
@@ -77,7 +144,9 @@ if __name__ == "__main__":
     
     # Setup logger
     setup_logger(
-        log_level="DEBUG" if settings.debug else "INFO"
+        log_level="DEBUG" if settings.debug else "INFO",
+        # Zipping rotated logs isn't worth the CPU during development
+        compression=None if settings.debug else "zip"
     )
     
     # Run application
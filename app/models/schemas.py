@@ -63,6 +63,7 @@ class ResearchResponse(BaseModel):
     error_message: Optional[str] = None
     
     class Config:
+        defer_build = True
         schema_extra = {
             "example": {
                 "job_id": "abc123",
@@ -76,6 +77,13 @@ class ResearchResponse(BaseModel):
         }
 
 
+class ReportDraft(BaseModel):
+    """Structured LLM output drafting a report."""
+    title: str
+    executive_summary: str
+    synthesis: str
+
+
 class ResearchReport(BaseModel):
     """Complete research report."""
     title: str
@@ -85,6 +93,9 @@ class ResearchReport(BaseModel):
     citations: List[Citation]
     generated_at: datetime
     metadata: Dict[str, Any] = {}
+    
+    class Config:
+        defer_build = True
 
 
 class JobStatusResponse(BaseModel):
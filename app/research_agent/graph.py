@@ -1,24 +1,15 @@
-"""
-LangGraph workflow definition for research agent.
-"""
-"""LangGraph workflow definition for research agent.
+"""Workflow definition for research agent.
 
-This module tries to use langgraph when available. If langgraph is not
-available or its API is incompatible (import errors like missing
-CheckpointAt), we fall back to a lightweight sequential executor that
-runs the same node functions in order. This keeps the project runnable
-without requiring a specific langgraph version.
+The research nodes run on a small in-process executor that starts
+independent nodes concurrently. langgraph isn't used: its 0.0.x releases
+can't express the workflow (nodes take a slotted ResearchState and the
+parallel branches join at the report).
 """
 
-from typing import Any, Dict
-
-try:
-    from langgraph.graph import StateGraph, END  # type: ignore
-    LANGGRAPH_AVAILABLE = True
-except Exception:
-    StateGraph = None  # type: ignore
-    END = None  # type: ignore
-    LANGGRAPH_AVAILABLE = False
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, ClassVar, Dict, FrozenSet, Set, Tuple, get_type_hints
+import asyncio
 
 from app.research_agent.state import ResearchState
 from app.research_agent.nodes import (
@@ -26,172 +17,131 @@ from app.research_agent.nodes import (
     web_search_node,
     content_filter_node,
     content_extraction_node,
-    synthesizer_node,
+    draft_report_node,
     citation_handler_node,
     report_generator_node,
     error_handler_node
 )
+from app.utils.error_handlers import ResearchAgentError
 from app.utils.logger import app_logger
 
 
-def should_continue(state: ResearchState) -> str:
+# Reducers declared on state fields via `Annotated[..., reducer]`
+REDUCERS: Dict[str, Callable[[Any, Any], Any]] = {
+    name: hint.__metadata__[0]
+    for name, hint in get_type_hints(ResearchState, include_extras=True).items()
+    if getattr(hint, "__metadata__", None)
+}
+
+
+def apply_updates(state: ResearchState, updates: Dict[str, Any]):
     """
-    Determine if workflow should continue or handle error.
+    Apply a node's returned fields to the state.
     
     Args:
         state: Current research state
-        
-    Returns:
-        Next node to execute
+        updates: Fields returned by the node (or None)
     """
-    if state.get("error_message"):
-        return "error_handler"
-    return "continue"
+    for key, value in (updates or {}).items():
+        reducer = REDUCERS.get(key)
+        if reducer is not None:
+            value = reducer(getattr(state, key), value)
+        setattr(state, key, value)
 
 
-def build_research_graph() -> StateGraph:
+@dataclass(frozen=True)
+class MinimalGraph:
     """
-    Build and compile the research workflow graph.
+    Executor for the research workflow.
     
-    Returns:
-        Compiled LangGraph workflow
+    Nodes are declared with their dependencies and run as a small DAG:
+    every node whose dependencies have finished is started, and
+    independent nodes (e.g. citation handling and content extraction /
+    synthesis) run concurrently. Once a stage fails or records an
+    `error_message`, no further stages start and the error handler
+    builds the report.
     """
-    app_logger.info("Building research workflow graph")
 
-    # Try to build using langgraph if available. Do a runtime import/use inside
-    # a try/except so any incompatibility inside langgraph (different versions
-    # that raise import errors for internal symbols like CheckpointAt) will be
-    # caught and we will fall back to the MinimalGraph implementation.
-    try:
-        if not (LANGGRAPH_AVAILABLE and StateGraph is not None):
-            raise Exception("langgraph not available")
-
-        # Create graph using langgraph
-        workflow = StateGraph(ResearchState)
-
-        # Add nodes
-        workflow.add_node("query_intake", query_intake_node)
-        workflow.add_node("web_search", web_search_node)
-        workflow.add_node("content_filter", content_filter_node)
-        workflow.add_node("content_extraction", content_extraction_node)
-        workflow.add_node("synthesizer", synthesizer_node)
-        workflow.add_node("citation_handler", citation_handler_node)
-        workflow.add_node("report_generator", report_generator_node)
-        workflow.add_node("error_handler", error_handler_node)
-
-        # Set entry point
-        workflow.set_entry_point("query_intake")
-
-        # Add edges (conditional transitions)
-        workflow.add_conditional_edges(
-            "query_intake",
-            should_continue,
-            {
-                "continue": "web_search",
-                "error_handler": "error_handler"
-            }
-        )
-
-        workflow.add_conditional_edges(
-            "web_search",
-            should_continue,
-            {
-                "continue": "content_filter",
-                "error_handler": "error_handler"
-            }
-        )
-
-        workflow.add_conditional_edges(
-            "content_filter",
-            should_continue,
-            {
-                "continue": "content_extraction",
-                "error_handler": "error_handler"
-            }
-        )
-
-        workflow.add_conditional_edges(
-            "content_extraction",
-            should_continue,
-            {
-                "continue": "synthesizer",
-                "error_handler": "error_handler"
-            }
-        )
-
-        workflow.add_conditional_edges(
-            "synthesizer",
-            should_continue,
-            {
-                "continue": "citation_handler",
-                "error_handler": "error_handler"
-            }
-        )
-
-        workflow.add_conditional_edges(
-            "citation_handler",
-            should_continue,
-            {
-                "continue": "report_generator",
-                "error_handler": "error_handler"
-            }
-        )
-
-        workflow.add_edge("report_generator", END)
-        workflow.add_edge("error_handler", END)
-
-        # Compile graph
-        app = workflow.compile()
-
-        app_logger.info("Research workflow graph compiled successfully (langgraph)")
-        return app
-    except Exception as e:
-        # Any exception when importing/using langgraph (including internal
-        # import errors) will be handled here and the fallback executor used.
-        app_logger.exception("langgraph import/use failed, falling back: %s", e)
-
-    # Fallback: minimal sequential executor when langgraph is not usable
-    app_logger.warning("langgraph unavailable or incompatible — using fallback executor")
-
-    class MinimalGraph:
-        def __init__(self):
-            self.nodes = [
-                query_intake_node,
-                web_search_node,
-                content_filter_node,
-                content_extraction_node,
-                synthesizer_node,
-                citation_handler_node,
-                report_generator_node,
-            ]
-
-        def invoke(self, state: Dict[str, Any]):
-            # Run nodes sequentially, updating state dict
-            for node in self.nodes:
+    # (name, node function, names of nodes it depends on)
+    nodes: ClassVar[Tuple[Tuple[str, Callable[[ResearchState], Any], FrozenSet[str]], ...]] = (
+        ("query_intake", query_intake_node, frozenset()),
+        ("web_search", web_search_node, frozenset({"query_intake"})),
+        ("content_filter", content_filter_node, frozenset({"web_search"})),
+        ("content_extraction", content_extraction_node, frozenset({"content_filter"})),
+        ("citation_handler", citation_handler_node, frozenset({"content_filter"})),
+        ("draft_report", draft_report_node, frozenset({"content_extraction"})),
+        ("report_generator", report_generator_node, frozenset({"draft_report", "citation_handler"})),
+    )
+
+    def invoke(self, state: ResearchState):
+        """Run the workflow from synchronous code."""
+        return asyncio.run(self.ainvoke(state))
+
+    async def ainvoke(self, state: ResearchState):
+        """Run the workflow, executing independent nodes concurrently."""
+        done: Set[str] = set()
+        pending = list(self.nodes)
+
+        async def run(name: str, node: Callable[[ResearchState], Any]):
+            # Synchronous nodes run off the event loop
+            try:
+                if asyncio.iscoroutinefunction(node):
+                    result = await node(state)
+                else:
+                    result = await asyncio.to_thread(node, state)
+            except Exception as e:
+                app_logger.error("Node {} failed: {}", name, e)
+                raise
+            # nodes return the fields they changed (or None)
+            apply_updates(state, result)
+            done.add(name)
+
+        while pending:
+            ready = [(name, node) for name, node, deps in pending if deps <= done]
+            pending = [entry for entry in pending if entry[2] - done]
+            try:
+                await asyncio.gather(*(run(name, node) for name, node in ready))
+            except ResearchAgentError:
+                # Expected failures (e.g. rate limits) fail the job
+                raise
+            except Exception:
+                failed = True
+            else:
+                # Nodes catch their own errors and record them in the state
+                failed = state.error_message is not None
+            if failed:
+                # Later stages would only build on missing results, so the
+                # run ends with the error report
                 try:
-                    result = node(state)
-                    # nodes may return modified state or None
-                    if isinstance(result, dict):
-                        state.update(result)
-                except Exception as e:
-                    app_logger.error(f"Node {getattr(node, '__name__', str(node))} failed: {e}")
-                    # call error handler
-                    try:
-                        error_handler_node(state)
-                    except Exception:
-                        pass
-                    break
-            # Build a simple report-like result
-            return {
-                "report_title": state.get("report_title", "Research Report"),
-                "report_markdown": state.get("report_markdown", ""),
-                "executive_summary": state.get("executive_summary", ""),
-                "query": state.get("query", ""),
-                "started_at": state.get("started_at"),
-                "user_id": state.get("user_id"),
-                "citations": state.get("citations", []),
-            }
-
+                    apply_updates(state, error_handler_node(state))
+                except Exception:
+                    pass
+                break
+
+        # Build a simple report-like result
+        return {
+            "report_title": state.report_title or "Research Report",
+            "report_markdown": state.report_markdown,
+            "executive_summary": state.executive_summary,
+            "query": state.query,
+            "started_at": state.started_at,
+            "user_id": state.user_id,
+            "citations": state.citations,
+        }
+
+
+@lru_cache(maxsize=1)
+def build_research_graph() -> MinimalGraph:
+    """
+    Build the research workflow graph.
+    
+    The result is cached, so repeated calls in a process reuse the
+    same graph.
+    
+    Returns:
+        Research workflow executor
+    """
+    app_logger.info("Building research workflow graph")
     return MinimalGraph()
 
 
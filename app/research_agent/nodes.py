@@ -1,12 +1,22 @@
 """
-LangGraph nodes for the research workflow.
+Nodes for the research workflow.
 """
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
+from functools import lru_cache
+import json
+import threading
 from langchain_openai import ChatOpenAI
+from langchain.globals import set_llm_cache
 from langchain.prompts import ChatPromptTemplate
+from langchain_community.cache import SQLiteCache
+from app.models.schemas import ReportDraft
 from app.research_agent.state import ResearchState
+from app.research_agent.structs import Citation
 from app.research_agent.tools import WebSearchTool, ContentExtractor, RelevanceFilter
+from app.services.llm_batcher import LLMBatcher
+from app.services.llm_cache import LangChainResponseCache, llm_response_cache
+from app.utils.error_handlers import LLMRateLimitError
 from app.utils.logger import app_logger
 from app.config import settings
 
@@ -16,18 +26,103 @@ search_tool = WebSearchTool()
 content_extractor = ContentExtractor()
 relevance_filter = RelevanceFilter()
 
-# Initialize LLM lazily. If OpenAI key or provider is not configured,
-# fall back to a None value and let nodes use a lightweight dummy
-# behavior so the project can run without external API keys.
-try:
-    llm = ChatOpenAI(
-        model=settings.openai_model,
-        temperature=0.3,
-        api_key=settings.openai_api_key
-    )
-except Exception:
-    app_logger.warning("LLM (ChatOpenAI) not configured or failed to initialize; using offline fallbacks")
-    llm = None
+# Per-service concurrency limits shared by all jobs running in this process
+# (LLM calls are bounded by the batcher below)
+search_semaphore = threading.BoundedSemaphore(settings.max_concurrent_searches)
+
+# Cache zero-temperature LLM responses in memory (and on disk when
+# llm_cache_path is set), keyed by model parameters and prompt, so
+# re-running a research query does not pay for identical calls again
+set_llm_cache(LangChainResponseCache(
+    llm_response_cache,
+    SQLiteCache(database_path=settings.llm_cache_path) if settings.llm_cache_path else None
+))
+
+@lru_cache(maxsize=1)
+def get_llm() -> Optional[ChatOpenAI]:
+    """
+    Return the shared chat model, creating it on first use.
+    
+    If OpenAI key or provider is not configured, returns None and nodes
+    use a lightweight dummy behavior so the project can run without
+    external API keys.
+    
+    Returns:
+        ChatOpenAI instance, or None
+    """
+    try:
+        return ChatOpenAI(
+            model=settings.openai_model,
+            temperature=settings.llm_temperature,
+            api_key=settings.openai_api_key,
+            base_url=settings.llm_base_url or None,
+            # Sampled (temperature > 0) responses are never served from cache
+            cache=None if settings.llm_temperature == 0 else False
+        )
+    except Exception:
+        app_logger.warning("LLM (ChatOpenAI) not configured or failed to initialize; using offline fallbacks")
+        return None
+
+
+def warm_up_llm():
+    """
+    Open a pooled connection to the LLM endpoint before the first job.
+    
+    The first call otherwise pays for creating the client and the
+    TCP + TLS handshake. Best effort: any error is ignored.
+    """
+    llm = get_llm()
+    if llm is None:
+        return
+    try:
+        # Listing models is free and goes through the OpenAI client (and
+        # connection pool) the chat completions use
+        llm.client._client.with_options(timeout=5.0, max_retries=0).models.list()
+    except Exception as e:
+        app_logger.debug("LLM warm-up failed: {}", e)
+
+
+@lru_cache(maxsize=1)
+def get_llm_batcher() -> Optional[LLMBatcher]:
+    """
+    Return the micro-batcher all LLM calls from concurrent jobs go through.
+    
+    Returns:
+        LLMBatcher, or None if the LLM is unavailable
+    """
+    llm = get_llm()
+    return LLMBatcher(llm) if llm is not None else None
+
+
+@lru_cache(maxsize=1)
+def get_draft_batcher() -> Optional[LLMBatcher]:
+    """
+    Return the batcher for report drafts, which ask for a JSON object
+    holding every part of the draft.
+    
+    Returns:
+        LLMBatcher, or None if the LLM is unavailable
+    """
+    llm = get_llm()
+    if llm is None:
+        return None
+    return LLMBatcher(llm.bind(response_format={"type": "json_object"}))
+
+
+# Stable parts first (static system prompt, then the large web content)
+# and the short query last, so providers' automatic prompt-prefix caching
+# can reuse the longest possible prefix
+draft_prompt = ChatPromptTemplate.from_messages([
+    ("system", (
+        "You are a research analyst. Synthesize the provided web content into a comprehensive, "
+        "well-structured analysis that answers the research query. Be objective, factual, and "
+        "cite key findings. Respond with a JSON object with the keys \"synthesis\" (the full "
+        "analysis), \"title\" (a concise, professional title for the research report) and "
+        "\"executive_summary\" (a brief 2-3 sentence summary of the findings)."
+    )),
+    ("user", "Web Content:\n{content}"),
+    ("user", "Research Query: {query}\n\nProvide a comprehensive synthesis.")
+])
 
 
 def query_intake_node(state: ResearchState) -> Dict[str, Any]:
@@ -38,20 +133,22 @@ def query_intake_node(state: ResearchState) -> Dict[str, Any]:
         state: Current research state
         
     Returns:
-        Updated state
+        State updates
     """
-    app_logger.info(f"[Query Intake] Processing query: {state['query']}")
+    app_logger.info(f"[Query Intake] Processing query: {state.query}")
     
-    state["current_step"] = "query_intake"
-    state["progress_messages"].append(f"Processing query: {state['query']}")
+    updates: Dict[str, Any] = {
+        "current_step": "query_intake",
+        "progress_messages": [f"Processing query: {state.query}"],
+    }
     
     # Validate query
-    if not state["query"] or len(state["query"]) < 5:
-        state["error_message"] = "Query too short or empty"
-        return state
+    if not state.query or len(state.query) < 5:
+        updates["error_message"] = "Query too short or empty"
+        return updates
     
-    app_logger.info(f"[Query Intake] Query validated for job {state['job_id']}")
-    return state
+    app_logger.info(f"[Query Intake] Query validated for job {state.job_id}")
+    return updates
 
 
 def web_search_node(state: ResearchState) -> Dict[str, Any]:
@@ -62,27 +159,30 @@ def web_search_node(state: ResearchState) -> Dict[str, Any]:
         state: Current research state
         
     Returns:
-        Updated state with search results
+        State updates with search results
     """
-    app_logger.info(f"[Web Search] Searching for: {state['query']}")
+    app_logger.info(f"[Web Search] Searching for: {state.query}")
     
-    state["current_step"] = "web_search"
-    state["progress_messages"].append("Searching the web...")
+    updates: Dict[str, Any] = {
+        "current_step": "web_search",
+        "progress_messages": ["Searching the web..."],
+    }
     
     try:
         # Perform web search
-        results = search_tool.search(state["query"], state["max_results"])
-        state["raw_search_results"] = results
+        with search_semaphore:
+            results = search_tool.search(state.query, state.max_results)
+        updates["raw_search_results"] = results
         
         app_logger.info(f"[Web Search] Found {len(results)} results")
-        state["progress_messages"].append(f"Found {len(results)} search results")
+        updates["progress_messages"].append(f"Found {len(results)} search results")
         
     except Exception as e:
         app_logger.error(f"[Web Search] Error: {str(e)}")
-        state["error_message"] = f"Search error: {str(e)}"
-        state["raw_search_results"] = []
+        updates["error_message"] = f"Search error: {str(e)}"
+        updates["raw_search_results"] = []
     
-    return state
+    return updates
 
 
 def content_filter_node(state: ResearchState) -> Dict[str, Any]:
@@ -93,32 +193,35 @@ def content_filter_node(state: ResearchState) -> Dict[str, Any]:
         state: Current research state
         
     Returns:
-        Updated state with filtered results
+        State updates with filtered results
     """
     app_logger.info("[Content Filter] Filtering search results")
     
-    state["current_step"] = "content_filter"
-    state["progress_messages"].append("Filtering relevant results...")
+    updates: Dict[str, Any] = {
+        "current_step": "content_filter",
+        "progress_messages": ["Filtering relevant results..."],
+    }
     
     try:
-        results = state["raw_search_results"]
-        filtered = relevance_filter.filter_results(results, state["query"])
-        
-        # Take top results
-        state["filtered_results"] = filtered[:state["max_results"]]
+        results = state.raw_search_results
+        # Keep the top results
+        kept = relevance_filter.filter_results(
+            results, state.query, top_k=state.max_results
+        )
+        updates["filtered_results"] = kept
         
-        app_logger.info(f"[Content Filter] Kept {len(state['filtered_results'])} relevant results")
-        state["progress_messages"].append(f"Filtered to {len(state['filtered_results'])} relevant sources")
+        app_logger.info(f"[Content Filter] Kept {len(kept)} relevant results")
+        updates["progress_messages"].append(f"Filtered to {len(kept)} relevant sources")
         
     except Exception as e:
         app_logger.error(f"[Content Filter] Error: {str(e)}")
-        state["error_message"] = f"Filter error: {str(e)}"
-        state["filtered_results"] = state["raw_search_results"]
+        updates["error_message"] = f"Filter error: {str(e)}"
+        updates["filtered_results"] = state.raw_search_results
     
-    return state
+    return updates
 
 
-def content_extraction_node(state: ResearchState) -> Dict[str, Any]:
+async def content_extraction_node(state: ResearchState) -> Dict[str, Any]:
     """
     Extract full content from top search results.
     
@@ -126,81 +229,92 @@ def content_extraction_node(state: ResearchState) -> Dict[str, Any]:
         state: Current research state
         
     Returns:
-        Updated state with extracted content
+        State updates with extracted content
     """
     app_logger.info("[Content Extraction] Extracting content from URLs")
     
-    state["current_step"] = "content_extraction"
-    state["progress_messages"].append("Extracting content from sources...")
+    updates: Dict[str, Any] = {
+        "current_step": "content_extraction",
+        "progress_messages": ["Extracting content from sources..."],
+    }
     
     try:
         # Extract content from top 5 results
-        urls = [r["url"] for r in state["filtered_results"][:5]]
-        extracted = content_extractor.batch_extract(urls)
+        urls = [r["url"] for r in state.filtered_results[:5]]
+        extracted = await content_extractor.batch_extract(urls)
         
-        state["extracted_content"] = extracted
+        updates["extracted_content"] = extracted
         
         app_logger.info(f"[Content Extraction] Extracted {len(extracted)} pages")
-        state["progress_messages"].append(f"Extracted content from {len(extracted)} sources")
+        updates["progress_messages"].append(f"Extracted content from {len(extracted)} sources")
         
     except Exception as e:
         app_logger.error(f"[Content Extraction] Error: {str(e)}")
-        state["error_message"] = f"Extraction error: {str(e)}"
-        state["extracted_content"] = []
+        updates["error_message"] = f"Extraction error: {str(e)}"
+        updates["extracted_content"] = []
     
-    return state
+    return updates
 
 
-def synthesizer_node(state: ResearchState) -> Dict[str, Any]:
+async def draft_report_node(state: ResearchState) -> Dict[str, Any]:
     """
-    Synthesize extracted content into a coherent summary using LLM.
+    Draft the report (synthesis, title and executive summary) using LLM.
+    
+    All three parts come from one structured (JSON) LLM call, so the
+    extracted web content is sent to the model only once.
     
     Args:
         state: Current research state
         
     Returns:
-        Updated state with synthesized content
+        State updates with synthesized content, title and summary
     """
-    app_logger.info("[Synthesizer] Synthesizing research findings")
+    app_logger.info("[Draft Report] Synthesizing research findings")
     
-    state["current_step"] = "synthesizer"
-    state["progress_messages"].append("Synthesizing findings...")
+    updates: Dict[str, Any] = {
+        "current_step": "draft_report",
+        "progress_messages": ["Synthesizing findings..."],
+    }
     
     try:
         # Prepare content for synthesis
         content_chunks = []
-        for item in state["extracted_content"]:
+        for item in state.extracted_content:
             content_chunks.append(f"Source: {item['url']}\n{item['content'][:2000]}")
         
         combined_content = "\n\n---\n\n".join(content_chunks)
         
-        # Create synthesis prompt
-        synthesis_prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a research analyst. Synthesize the provided web content into a comprehensive, 
-            well-structured analysis that answers the research query. Be objective, factual, and cite key findings."""),
-            ("user", "Research Query: {query}\n\nWeb Content:\n{content}\n\nProvide a comprehensive synthesis.")
-        ])
-        
-        if llm is None:
-            # Offline fallback: create a simple synthesized placeholder
-            state["synthesized_content"] = "(LLM unavailable - synthesized content placeholder)"
+        draft_batcher = get_draft_batcher()
+        if draft_batcher is None:
+            # Offline fallback: create simple placeholders
+            draft = ReportDraft(
+                title=f"Research Report: {state.query[:50]}",
+                executive_summary="(LLM unavailable - summary placeholder)",
+                synthesis="(LLM unavailable - synthesized content placeholder)"
+            )
         else:
-            chain = synthesis_prompt | llm
-            response = chain.invoke({
-                "query": state["query"],
-                "content": combined_content[:15000]  # Limit token usage
-            })
-            state["synthesized_content"] = response.content
-        
-        app_logger.info("[Synthesizer] Synthesis completed")
-        state["progress_messages"].append("Synthesized research findings")
-        
+            response = await draft_batcher.asubmit(draft_prompt.format_prompt(
+                query=state.query,
+                content=combined_content[:15000]  # Limit token usage
+            ))
+            draft = ReportDraft(**json.loads(response.content))
+        
+        updates["report_title"] = draft.title.strip('"')
+        updates["executive_summary"] = draft.executive_summary
+        updates["synthesized_content"] = draft.synthesis
+        
+        app_logger.info("[Draft Report] Draft completed")
+        updates["progress_messages"].append("Synthesized research findings")
+        
+    except LLMRateLimitError:
+        # Retrying the remaining nodes would only hit the limit again
+        raise
     except Exception as e:
-        app_logger.error(f"[Synthesizer] Error: {str(e)}")
-        state["error_message"] = f"Synthesis error: {str(e)}"
-        state["synthesized_content"] = "Error synthesizing content"
+        app_logger.error(f"[Draft Report] Error: {str(e)}")
+        updates["error_message"] = f"Synthesis error: {str(e)}"
+        updates["synthesized_content"] = "Error synthesizing content"
     
-    return state
+    return updates
 
 
 def citation_handler_node(state: ResearchState) -> Dict[str, Any]:
@@ -211,38 +325,45 @@ def citation_handler_node(state: ResearchState) -> Dict[str, Any]:
         state: Current research state
         
     Returns:
-        Updated state with citations
+        State updates with citations
     """
     app_logger.info("[Citation Handler] Generating citations")
     
-    state["current_step"] = "citation_handler"
-    state["progress_messages"].append("Generating citations...")
+    updates: Dict[str, Any] = {
+        "current_step": "citation_handler",
+        "progress_messages": ["Generating citations..."],
+    }
+    
+    if not state.include_citations:
+        # Citations would not be rendered in the report
+        updates["citations"] = []
+        updates["progress_messages"].append("Citations disabled")
+        return updates
     
     try:
-        citations = []
         accessed_date = datetime.now().strftime("%Y-%m-%d")
+        citations = [
+            Citation(
+                title=result.get("title", "Unknown"),
+                url=result.get("url", ""),
+                source=result.get("source", ""),
+                accessed_date=accessed_date,
+                snippet=result.get("snippet", "")
+            )
+            for result in state.filtered_results[:state.max_results]
+        ]
         
-        for result in state["filtered_results"]:
-            citation = {
-                "title": result.get("title", "Unknown"),
-                "url": result.get("url", ""),
-                "source": result.get("source", ""),
-                "accessed_date": accessed_date,
-                "snippet": result.get("snippet", "")
-            }
-            citations.append(citation)
-        
-        state["citations"] = citations
+        updates["citations"] = citations
         
         app_logger.info(f"[Citation Handler] Generated {len(citations)} citations")
-        state["progress_messages"].append(f"Generated {len(citations)} citations")
+        updates["progress_messages"].append(f"Generated {len(citations)} citations")
         
     except Exception as e:
         app_logger.error(f"[Citation Handler] Error: {str(e)}")
-        state["error_message"] = f"Citation error: {str(e)}"
-        state["citations"] = []
+        updates["error_message"] = f"Citation error: {str(e)}"
+        updates["citations"] = []
     
-    return state
+    return updates
 
 
 def report_generator_node(state: ResearchState) -> Dict[str, Any]:
@@ -253,86 +374,65 @@ def report_generator_node(state: ResearchState) -> Dict[str, Any]:
         state: Current research state
         
     Returns:
-        Updated state with complete report
+        State updates with complete report
     """
     app_logger.info("[Report Generator] Generating final report")
     
-    state["current_step"] = "report_generator"
-    state["progress_messages"].append("Generating final report...")
+    updates: Dict[str, Any] = {
+        "current_step": "report_generator",
+        "progress_messages": ["Generating final report..."],
+    }
     
     try:
-        # Generate report title
-        title_prompt = ChatPromptTemplate.from_messages([
-            ("system", "Generate a concise, professional title for this research report."),
-            ("user", "Research Query: {query}")
-        ])
-
-        if llm is None:
-            state["report_title"] = f"Research Report: {state['query'][:50]}"
-        else:
-            title_chain = title_prompt | llm
-            title_response = title_chain.invoke({"query": state["query"]})
-            state["report_title"] = title_response.content.strip('"')
-        
-        # Generate executive summary
-        summary_prompt = ChatPromptTemplate.from_messages([
-            ("system", "Create a brief executive summary (2-3 sentences) of the research findings."),
-            ("user", "Research Query: {query}\n\nFindings: {synthesis}")
-        ])
-        
-        if llm is None:
-            state["executive_summary"] = "(LLM unavailable - summary placeholder)"
-        else:
-            summary_chain = summary_prompt | llm
-            summary_response = summary_chain.invoke({
-                "query": state["query"],
-                "synthesis": state["synthesized_content"][:3000]
-            })
-            state["executive_summary"] = summary_response.content
-        
         # Create report sections
         sections = [
             {
                 "heading": "Executive Summary",
-                "content": state["executive_summary"]
+                "content": state.executive_summary
             },
             {
                 "heading": "Research Findings",
-                "content": state["synthesized_content"]
+                "content": state.synthesized_content
             },
             {
                 "heading": "Key Sources",
-                "content": "\n".join([f"- {r['title']}: {r['url']}" for r in state["filtered_results"][:5]])
+                "content": "\n".join([f"- {r['title']}: {r['url']}" for r in state.filtered_results[:5]])
             }
         ]
-        state["report_sections"] = sections
-        
-        # Generate markdown report
-        markdown = f"# {state['report_title']}\n\n"
-        markdown += f"**Research Query:** {state['query']}\n\n"
-        markdown += f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        markdown += "---\n\n"
-        
-        for section in sections:
-            markdown += f"## {section['heading']}\n\n{section['content']}\n\n"
+        updates["report_sections"] = sections
+        
+        # Generate markdown report (collected in a list and joined once,
+        # so long citation lists don't copy the report on every append)
+        parts = [
+            f"# {state.report_title}\n\n",
+            f"**Research Query:** {state.query}\n\n",
+            f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+            "---\n\n",
+        ]
+        parts.extend(
+            f"## {section['heading']}\n\n{section['content']}\n\n"
+            for section in sections
+        )
         
         # Add citations if enabled
-        if state["include_citations"] and state["citations"]:
-            markdown += "## References\n\n"
-            for i, citation in enumerate(state["citations"], 1):
-                markdown += f"{i}. {citation['title']}. Retrieved {citation['accessed_date']} from {citation['url']}\n"
+        if state.include_citations and state.citations:
+            parts.append("## References\n\n")
+            parts.extend(
+                f"{i}. {citation.title}. Retrieved {citation.accessed_date} from {citation.url}\n"
+                for i, citation in enumerate(state.citations, 1)
+            )
         
-        state["report_markdown"] = markdown
+        updates["report_markdown"] = "".join(parts)
         
         app_logger.info("[Report Generator] Report generated successfully")
-        state["progress_messages"].append("Report generated successfully")
+        updates["progress_messages"].append("Report generated successfully")
         
     except Exception as e:
         app_logger.error(f"[Report Generator] Error: {str(e)}")
-        state["error_message"] = f"Report generation error: {str(e)}"
-        state["report_markdown"] = f"# Error Generating Report\n\n{str(e)}"
+        updates["error_message"] = f"Report generation error: {str(e)}"
+        updates["report_markdown"] = f"# Error Generating Report\n\n{str(e)}"
     
-    return state
+    return updates
 
 
 def error_handler_node(state: ResearchState) -> Dict[str, Any]:
@@ -343,20 +443,20 @@ def error_handler_node(state: ResearchState) -> Dict[str, Any]:
         state: Current research state
         
     Returns:
-        Updated state with error handling
+        State updates with error handling
     """
-    app_logger.error(f"[Error Handler] Handling error: {state.get('error_message', 'Unknown error')}")
+    app_logger.error(f"[Error Handler] Handling error: {state.error_message or 'Unknown error'}")
     
-    state["current_step"] = "error_handler"
+    updates: Dict[str, Any] = {"current_step": "error_handler"}
     
     # Create error report
     error_report = f"# Research Report - Error\n\n"
-    error_report += f"**Query:** {state['query']}\n\n"
-    error_report += f"**Error:** {state['error_message']}\n\n"
-    error_report += f"**Step Failed:** {state['current_step']}\n\n"
+    error_report += f"**Query:** {state.query}\n\n"
+    error_report += f"**Error:** {state.error_message}\n\n"
+    error_report += f"**Step Failed:** {state.current_step}\n\n"
     error_report += "Please try again or contact support if the issue persists."
     
-    state["report_markdown"] = error_report
-    state["completed_at"] = datetime.now()
+    updates["report_markdown"] = error_report
+    updates["completed_at"] = datetime.now()
     
-    return state
\ No newline at end of file
+    return updates
\ No newline at end of file
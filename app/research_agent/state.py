@@ -1,14 +1,24 @@
 """
-State management for LangGraph research workflow.
+State management for the research workflow.
 """
-from typing import TypedDict, List, Optional, Dict, Any
+from typing import Annotated, List, Optional, Dict, Any
+from dataclasses import dataclass, field, asdict
 from datetime import datetime
+import operator
 
+from app.research_agent.structs import Citation
 
-class ResearchState(TypedDict):
+
+@dataclass(slots=True)
+class ResearchState:
     """
     State object shared across all nodes in the research graph.
     This state is passed between nodes and maintains the workflow state.
+    
+    Nodes read fields as attributes and return a dict of the fields they
+    changed, which the graph applies to the state. Fields annotated with a
+    reducer (e.g. `operator.add`) are merged with the current value instead
+    of replaced, so concurrent nodes can each contribute to them.
     """
     # Input
     query: str
@@ -18,33 +28,42 @@ class ResearchState(TypedDict):
     include_citations: bool
     
     # Search results
-    raw_search_results: List[Dict[str, Any]]
-    filtered_results: List[Dict[str, Any]]
+    raw_search_results: List[Dict[str, Any]] = field(default_factory=list)
+    filtered_results: List[Dict[str, Any]] = field(default_factory=list)
     
     # Content
-    extracted_content: List[Dict[str, str]]
-    synthesized_content: str
+    extracted_content: List[Dict[str, str]] = field(default_factory=list)
+    synthesized_content: str = ""
     
     # Report components
-    report_title: str
-    executive_summary: str
-    report_sections: List[Dict[str, Any]]
-    citations: List[Dict[str, Any]]
+    report_title: str = ""
+    executive_summary: str = ""
+    report_sections: List[Dict[str, Any]] = field(default_factory=list)
+    citations: List[Citation] = field(default_factory=list)
     
     # Final output
-    report_markdown: str
-    google_doc_url: Optional[str]
-    n8n_response: Optional[Dict[str, Any]]
+    report_markdown: str = ""
+    google_doc_url: Optional[str] = None
+    n8n_response: Optional[Dict[str, Any]] = None
     
     # Workflow metadata
-    current_step: str
-    error_message: Optional[str]
-    retry_count: int
-    started_at: datetime
-    completed_at: Optional[datetime]
+    current_step: str = "initialized"
+    error_message: Optional[str] = None
+    retry_count: int = 0
+    started_at: datetime = field(default_factory=datetime.now)
+    completed_at: Optional[datetime] = None
     
     # Progress tracking
-    progress_messages: List[str]
+    progress_messages: Annotated[List[str], operator.add] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the state to a plain dictionary.
+        
+        Returns:
+            State fields keyed by name
+        """
+        return asdict(self)
 
 
 def create_initial_state(
@@ -68,39 +87,9 @@ def create_initial_state(
         Initial research state
     """
     return ResearchState(
-        # Input
         query=query,
         job_id=job_id,
         user_id=user_id,
         max_results=max_results,
-        include_citations=include_citations,
-        
-        # Search results
-        raw_search_results=[],
-        filtered_results=[],
-        
-        # Content
-        extracted_content=[],
-        synthesized_content="",
-        
-        # Report components
-        report_title="",
-        executive_summary="",
-        report_sections=[],
-        citations=[],
-        
-        # Final output
-        report_markdown="",
-        google_doc_url=None,
-        n8n_response=None,
-        
-        # Workflow metadata
-        current_step="initialized",
-        error_message=None,
-        retry_count=0,
-        started_at=datetime.now(),
-        completed_at=None,
-        
-        # Progress tracking
-        progress_messages=[]
-    )
\ No newline at end of file
+        include_citations=include_citations
+    )
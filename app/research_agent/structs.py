@@ -0,0 +1,20 @@
+"""
+Lightweight structures passed between research workflow nodes.
+
+These are trusted, internally built objects, so they use msgspec structs
+(no validation on construction) rather than Pydantic models. The Pydantic
+schemas in `app.models.schemas` remain the API-facing representation;
+convert with `msgspec.to_builtins` at that boundary.
+"""
+from typing import Optional
+
+import msgspec
+
+
+class Citation(msgspec.Struct, frozen=True):
+    """Citation for a source used in a report (mirrors `schemas.Citation`)."""
+    source: str
+    accessed_date: str
+    url: Optional[str] = None
+    title: Optional[str] = None
+    snippet: Optional[str] = None
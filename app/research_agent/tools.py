@@ -2,20 +2,53 @@
 Research tools for web search and content extraction.
 """
 from typing import List, Dict, Any, Optional
+from functools import cached_property
+from operator import itemgetter
+import asyncio
+import heapq
+import re
+import threading
+import weakref
+from cachetools import TTLCache
 from duckduckgo_search import DDGS
-import requests
-from bs4 import BeautifulSoup
-import html2text
+import httpx
+from selectolax.lexbor import LexborHTMLParser
 from app.utils.logger import app_logger
 from app.config import settings
 
 
+# Headers sent when fetching pages for content extraction
+EXTRACT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+# Elements dropped (with their content) before extracting page text
+STRIPPED_TAGS = ["script", "style", "nav", "footer", "aside"]
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for use as a cache key."""
+    return " ".join(query.lower().split())
+
+
 class WebSearchTool:
     """Tool for searching the web using DuckDuckGo."""
     
     def __init__(self):
-        self.ddgs = DDGS()
         self.max_results = settings.max_search_results
+        # Recent results by (normalized query, limit); searches run in
+        # worker threads, hence the lock
+        self._cache: TTLCache = TTLCache(
+            maxsize=settings.search_cache_max_size,
+            ttl=settings.search_cache_ttl_seconds
+        )
+        self._cache_lock = threading.Lock()
+    
+    @cached_property
+    def ddgs(self) -> DDGS:
+        """DuckDuckGo client, created on first search."""
+        return DDGS()
     
     def search(self, query: str, max_results: Optional[int] = None) -> List[Dict[str, Any]]:
         """
@@ -28,9 +61,16 @@ class WebSearchTool:
         Returns:
             List of search results with title, url, and snippet
         """
+        results_limit = max_results or self.max_results
+        key = (normalize_query(query), results_limit)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            app_logger.info(f"Using cached search results for: {query}")
+            return list(cached)
+        
         try:
             app_logger.info(f"Searching web for: {query}")
-            results_limit = max_results or self.max_results
             
             results = []
             search_results = self.ddgs.text(query, max_results=results_limit)
@@ -44,7 +84,10 @@ class WebSearchTool:
                 })
             
             app_logger.info(f"Found {len(results)} search results")
-            return results
+            if results:
+                with self._cache_lock:
+                    self._cache[key] = results
+            return list(results)
             
         except Exception as e:
             app_logger.error(f"Search error: {str(e)}")
@@ -55,13 +98,46 @@ class ContentExtractor:
     """Tool for extracting content from web pages."""
     
     def __init__(self):
-        self.html_converter = html2text.HTML2Text()
-        self.html_converter.ignore_links = False
-        self.html_converter.ignore_images = True
         self.max_content_length = settings.max_content_length
         self.timeout = 10
+        # One pooled HTTP/2 client per event loop (clients can't be shared
+        # across loops)
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the HTTP client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            # Connections are kept alive between jobs so repeat hosts skip
+            # the TCP/TLS handshake; failed connects are retried with backoff
+            transport = httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(
+                    max_connections=20,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=60
+                )
+            )
+            client = httpx.AsyncClient(
+                transport=transport,
+                headers=EXTRACT_HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True
+            )
+            self._clients[loop] = client
+        return client
     
-    def extract(self, url: str) -> Optional[Dict[str, str]]:
+    async def aclose(self):
+        """Close the HTTP client of the running event loop, if any."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+    
+    async def extract(self, url: str) -> Optional[Dict[str, str]]:
         """
         Extract text content from a URL.
         
@@ -74,25 +150,23 @@ class ContentExtractor:
         try:
             app_logger.info(f"Extracting content from: {url}")
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Stream the body and stop reading once there is more HTML than
+            # could survive truncation; skip anything that isn't HTML
+            async with self._get_client().stream("GET", url) as response:
+                response.raise_for_status()
+                if "html" not in response.headers.get("Content-Type", ""):
+                    app_logger.info(f"Skipping non-HTML content at: {url}")
+                    return None
+                
+                html = bytearray()
+                max_bytes = self.max_content_length * 4
+                async for chunk in response.aiter_bytes(65536):
+                    html.extend(chunk)
+                    if len(html) >= max_bytes:
+                        break
             
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "aside"]):
-                script.decompose()
-            
-            # Get text content
-            text = self.html_converter.handle(str(soup))
-            
-            # Truncate if too long
-            if len(text) > self.max_content_length:
-                text = text[:self.max_content_length] + "..."
+            # HTML parsing is CPU-bound; keep it off the event loop
+            text = await asyncio.to_thread(self._html_to_text, bytes(html))
             
             app_logger.info(f"Extracted {len(text)} characters from {url}")
             
@@ -101,43 +175,87 @@ class ContentExtractor:
                 "content": text.strip()
             }
             
-        except requests.Timeout:
+        except httpx.TimeoutException:
             app_logger.warning(f"Timeout extracting content from: {url}")
             return None
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             app_logger.warning(f"Error extracting content from {url}: {str(e)}")
             return None
         except Exception as e:
             app_logger.error(f"Unexpected error extracting {url}: {str(e)}")
             return None
     
-    def batch_extract(self, urls: List[str]) -> List[Dict[str, str]]:
+    def _html_to_text(self, html: bytes) -> str:
         """
-        Extract content from multiple URLs.
+        Convert a page's HTML to text.
+        
+        Args:
+            html: Raw page content
+            
+        Returns:
+            Page text, truncated to the maximum content length
+        """
+        tree = LexborHTMLParser(html)
+        
+        # Remove script, style and page chrome elements (in one native pass)
+        tree.strip_tags(STRIPPED_TAGS)
+        
+        # Plain text is all the LLM needs; stripping each text node keeps
+        # indentation and blank lines from eating the truncated excerpt
+        text = tree.body.text(separator=" ", strip=True) if tree.body else ""
+        
+        # Truncate if too long
+        if len(text) > self.max_content_length:
+            text = text[:self.max_content_length] + "..."
+        
+        return text
+    
+    async def batch_extract(self, urls: List[str]) -> List[Dict[str, str]]:
+        """
+        Extract content from multiple URLs concurrently.
         
         Args:
             urls: List of URLs to extract from
             
         Returns:
-            List of extracted content dictionaries
+            List of extracted content dictionaries, in the order of `urls`
         """
-        results = []
-        for url in urls:
-            content = self.extract(url)
-            if content:
-                results.append(content)
+        if not urls:
+            return []
         
-        return results
+        tasks = [asyncio.create_task(self.extract(url)) for url in urls]
+        done, pending = await asyncio.wait(tasks, timeout=self.timeout * 2)
+        if pending:
+            # Don't wait for pages that are still loading
+            for task in pending:
+                task.cancel()
+            app_logger.warning(f"Content extraction timed out; using {len(done)} of {len(urls)} pages")
+        
+        # Keep relevance order rather than completion order
+        return [task.result() for task in tasks if task in done and task.result()]
 
 
 class RelevanceFilter:
     """Filter and rank search results by relevance."""
     
+    # Words compared between the query and each result
+    _TOKEN_RE = re.compile(r"[a-z0-9]+")
+    
+    def __init__(self):
+        # Filtered results by (normalized query, min snippet length, top_k,
+        # URLs)
+        self._cache: TTLCache = TTLCache(
+            maxsize=settings.search_cache_max_size,
+            ttl=settings.search_cache_ttl_seconds
+        )
+        self._cache_lock = threading.Lock()
+    
     def filter_results(
         self, 
         results: List[Dict[str, Any]], 
         query: str, 
-        min_snippet_length: int = 50
+        min_snippet_length: int = 50,
+        top_k: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Filter search results based on relevance criteria.
@@ -146,12 +264,24 @@ class RelevanceFilter:
             results: List of search results
             query: Original query for relevance checking
             min_snippet_length: Minimum snippet length to keep
+            top_k: Only return this many of the most relevant results
             
         Returns:
-            Filtered list of results
+            Filtered list of results, most relevant first
         """
+        key = (
+            normalize_query(query),
+            min_snippet_length,
+            top_k,
+            tuple(result.get("url", "") for result in results)
+        )
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
         filtered = []
-        query_terms = query.lower().split()
+        query_terms = set(self._TOKEN_RE.findall(query.lower()))
         
         for result in results:
             # Skip results with very short snippets
@@ -159,16 +289,20 @@ class RelevanceFilter:
                 continue
             
             # Calculate simple relevance score based on query term matches
-            snippet_lower = result.get("snippet", "").lower()
-            title_lower = result.get("title", "").lower()
-            
-            score = sum(1 for term in query_terms if term in snippet_lower or term in title_lower)
+            text = f"{result.get('title', '')} {result.get('snippet', '')}".lower()
+            score = len(query_terms.intersection(self._TOKEN_RE.findall(text)))
             result["relevance_score"] = score
             
             filtered.append(result)
         
-        # Sort by relevance score
-        filtered.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
+        # Rank by relevance score; a heap avoids sorting every result when
+        # only the top few are kept
+        if top_k is not None and top_k < len(filtered):
+            filtered = heapq.nlargest(top_k, filtered, key=itemgetter("relevance_score"))
+        else:
+            filtered.sort(key=itemgetter("relevance_score"), reverse=True)
         
         app_logger.info(f"Filtered to {len(filtered)} relevant results")
-        return filtered
\ No newline at end of file
+        with self._cache_lock:
+            self._cache[key] = filtered
+        return list(filtered)
\ No newline at end of file
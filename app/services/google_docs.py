@@ -2,12 +2,58 @@
 Google Docs integration service.
 """
 from typing import Optional, Dict, Any
+from functools import lru_cache
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.model import JsonModel
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
+from app.utils.error_handlers import GoogleDocsError
 from app.utils.logger import app_logger
 from app.config import settings
+import asyncio
 import os
+import threading
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
+
+# Drive MIME type of a Google Docs document
+GOOGLE_DOC_MIME_TYPE = 'application/vnd.google-apps.document'
+
+# Maximum characters per insertText request
+INSERT_CHUNK_SIZE = 100_000
+
+
+class OrjsonModel(JsonModel):
+    """
+    Request model that serializes bodies with orjson.
+    
+    Report content is sent as one large string in a batchUpdate body, and
+    stdlib json dominated the CPU time of uploading it.
+    """
+    
+    def serialize(self, body_value):
+        """
+        Serialize a request body.
+        
+        Args:
+            body_value: Request body
+            
+        Returns:
+            JSON-encoded body as bytes
+        """
+        if isinstance(body_value, dict) and "data" not in body_value and self._data_wrapper:
+            body_value = {"data": body_value}
+        return orjson.dumps(body_value)
+
+
+# Model used for the API clients (stdlib JSON when orjson is missing)
+REQUEST_MODEL = OrjsonModel() if orjson is not None else JsonModel()
 
 
 class GoogleDocsService:
@@ -18,6 +64,8 @@ class GoogleDocsService:
         self.credentials = None
         self.docs_service = None
         self.drive_service = None
+        # Each worker thread keeps its own authorized connection
+        self._local = threading.local()
         self._initialize_services()
     
     def _initialize_services(self):
@@ -43,9 +91,23 @@ class GoogleDocsService:
                 scopes=SCOPES
             )
             
-            # Build services
-            self.docs_service = build('docs', 'v1', credentials=self.credentials)
-            self.drive_service = build('drive', 'v3', credentials=self.credentials)
+            # Build services from the discovery documents bundled with
+            # google-api-python-client, so no discovery request is sent
+            # (and nothing needs caching) when a process starts
+            self.docs_service = build(
+                'docs', 'v1',
+                credentials=self.credentials,
+                model=REQUEST_MODEL,
+                static_discovery=True,
+                cache_discovery=False
+            )
+            self.drive_service = build(
+                'drive', 'v3',
+                credentials=self.credentials,
+                model=REQUEST_MODEL,
+                static_discovery=True,
+                cache_discovery=False
+            )
             
             app_logger.info("Google Docs service initialized successfully")
             
@@ -67,7 +129,38 @@ class GoogleDocsService:
             folder_id: Optional folder ID to place document in
             
         Returns:
-            Dictionary with document_id and url, or None on failure
+            Dictionary with document_id and url, or None if the service
+            is not configured
+            
+        Raises:
+            GoogleDocsError: If the Google API rejects the request
+        """
+        doc = self.create_empty_document(title, folder_id)
+        if doc:
+            self.write_report(doc["document_id"], content)
+        return doc
+    
+    def create_empty_document(
+        self,
+        title: str,
+        folder_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Create an empty, link-shared Google Doc to be filled in later.
+        
+        This lets callers create the document while the report is still
+        being generated and only upload the content at the end.
+        
+        Args:
+            title: Document title
+            folder_id: Optional folder ID to place document in
+            
+        Returns:
+            Dictionary with document_id and url, or None if the service
+            is not configured
+            
+        Raises:
+            GoogleDocsError: If the Google API rejects the request
         """
         if not self.docs_service or not self.drive_service:
             app_logger.error("Google Docs service not initialized")
@@ -76,19 +169,21 @@ class GoogleDocsService:
         try:
             app_logger.info(f"Creating Google Doc: {title}")
             
-            # Create the document
-            doc = self.docs_service.documents().create(body={'title': title}).execute()
-            document_id = doc.get('documentId')
-            
-            app_logger.info(f"Document created with ID: {document_id}")
+            # Create the document directly in the target folder (one call
+            # instead of create + look up parents + move)
+            metadata = {'name': title, 'mimeType': GOOGLE_DOC_MIME_TYPE}
+            target_folder = folder_id or settings.google_docs_folder_id
+            if target_folder:
+                metadata['parents'] = [target_folder]
             
-            # Insert content
-            self._insert_content(document_id, content)
+            doc = self.drive_service.files().create(
+                body=metadata,
+                fields='id',
+                supportsAllDrives=True
+            ).execute(http=self._http())
+            document_id = doc.get('id')
             
-            # Move to folder if specified
-            if folder_id or settings.google_docs_folder_id:
-                target_folder = folder_id or settings.google_docs_folder_id
-                self._move_to_folder(document_id, target_folder)
+            app_logger.info(f"Document created with ID: {document_id}")
             
             # Make document accessible via link
             self._set_permissions(document_id)
@@ -105,11 +200,106 @@ class GoogleDocsService:
             }
             
         except HttpError as e:
-            app_logger.error(f"Google API error: {str(e)}")
-            return None
-        except Exception as e:
-            app_logger.error(f"Error creating Google Doc: {str(e)}")
-            return None
+            # The HttpError carries the full response body; keep only the status
+            raise GoogleDocsError(
+                f"Google API error {e.resp.status} creating document"
+            ) from None
+    
+    def write_report(
+        self,
+        document_id: str,
+        content: str,
+        title: Optional[str] = None
+    ):
+        """
+        Fill a document created with `create_empty_document`.
+        
+        Synchronous wrapper around `awrite_report` for callers without an
+        event loop.
+        
+        Args:
+            document_id: Document ID
+            content: Document content (plain text or markdown)
+            title: Optional final title to rename the document to
+            
+        Raises:
+            GoogleDocsError: If the Google API rejects the request
+        """
+        asyncio.run(self.awrite_report(document_id, content, title))
+    
+    async def awrite_report(
+        self,
+        document_id: str,
+        content: str,
+        title: Optional[str] = None
+    ):
+        """
+        Fill a document created with `create_empty_document`.
+        
+        Renaming the file and inserting the content are independent, so both
+        requests are sent concurrently from worker threads.
+        
+        Args:
+            document_id: Document ID
+            content: Document content (plain text or markdown)
+            title: Optional final title to rename the document to
+            
+        Raises:
+            GoogleDocsError: If the Google API rejects the request
+        """
+        steps = [asyncio.to_thread(self._insert_content, document_id, content)]
+        if title:
+            steps.append(asyncio.to_thread(self._rename, document_id, title))
+        
+        try:
+            await asyncio.gather(*steps)
+        except HttpError as e:
+            raise GoogleDocsError(
+                f"Google API error {e.resp.status} writing document"
+            ) from None
+    
+    def _http(self) -> AuthorizedHttp:
+        """
+        Return the calling thread's authorized HTTP connection.
+        
+        httplib2 connections are not thread-safe, so requests executed
+        concurrently must not share the services' default connection;
+        one connection per thread still keeps them alive between calls.
+        
+        Returns:
+            Authorized HTTP object
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return http
+    
+    def _rename(self, document_id: str, title: str):
+        """
+        Rename a document.
+        
+        Args:
+            document_id: Document ID
+            title: New title
+        """
+        self.drive_service.files().update(
+            fileId=document_id,
+            body={'name': title},
+            fields='id'
+        ).execute(http=self._http())
+    
+    def delete_document(self, document_id: str):
+        """
+        Delete a document (e.g. one created for a job that then failed).
+        
+        Args:
+            document_id: Document ID
+        """
+        try:
+            self.drive_service.files().delete(fileId=document_id).execute(http=self._http())
+            app_logger.info(f"Deleted document {document_id}")
+        except HttpError as e:
+            app_logger.warning(f"Could not delete document {document_id}: {e.resp.status}")
     
     def _insert_content(self, document_id: str, content: str):
         """
@@ -124,57 +314,31 @@ class GoogleDocsService:
             # For simplicity, we'll insert as plain text
             # You can enhance this to parse markdown and apply formatting
             
+            # Large reports are sent as several insertText requests (still
+            # one API call), each appending its chunk to the end of the body
+            # so no UTF-16 indexes need computing locally
             requests = [
                 {
                     'insertText': {
-                        'location': {
-                            'index': 1,
-                        },
-                        'text': content
+                        'endOfSegmentLocation': {},
+                        'text': content[i:i + INSERT_CHUNK_SIZE]
                     }
                 }
+                for i in range(0, len(content), INSERT_CHUNK_SIZE)
             ]
+            if not requests:
+                return
             
             self.docs_service.documents().batchUpdate(
                 documentId=document_id,
                 body={'requests': requests}
-            ).execute()
+            ).execute(http=self._http())
             
             app_logger.info(f"Content inserted into document {document_id}")
             
         except Exception as e:
             app_logger.error(f"Error inserting content: {str(e)}")
     
-    def _move_to_folder(self, document_id: str, folder_id: str):
-        """
-        Move document to a specific folder.
-        
-        Args:
-            document_id: Document ID
-            folder_id: Target folder ID
-        """
-        try:
-            # Get current parents
-            file = self.drive_service.files().get(
-                fileId=document_id,
-                fields='parents'
-            ).execute()
-            
-            previous_parents = ",".join(file.get('parents', []))
-            
-            # Move to new folder
-            self.drive_service.files().update(
-                fileId=document_id,
-                addParents=folder_id,
-                removeParents=previous_parents,
-                fields='id, parents'
-            ).execute()
-            
-            app_logger.info(f"Document moved to folder {folder_id}")
-            
-        except Exception as e:
-            app_logger.error(f"Error moving document to folder: {str(e)}")
-    
     def _set_permissions(self, document_id: str):
         """
         Set document permissions to be accessible via link.
@@ -191,7 +355,7 @@ class GoogleDocsService:
             self.drive_service.permissions().create(
                 fileId=document_id,
                 body=permission
-            ).execute()
+            ).execute(http=self._http())
             
             app_logger.info(f"Permissions set for document {document_id}")
             
@@ -199,5 +363,16 @@ class GoogleDocsService:
             app_logger.error(f"Error setting permissions: {str(e)}")
 
 
-# Global service instance
-google_docs_service = GoogleDocsService()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_google_docs_service() -> GoogleDocsService:
+    """
+    Return the shared Google Docs service.
+    
+    The service (and its API discovery clients) is built on first use
+    rather than at import, so processes that never publish a document
+    don't pay for it.
+    
+    Returns:
+        GoogleDocsService instance
+    """
+    return GoogleDocsService()
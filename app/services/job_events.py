@@ -0,0 +1,57 @@
+"""
+In-process notifications for research job status changes.
+"""
+from typing import Dict, Any, Set
+import asyncio
+
+
+class JobEvents:
+    """Fan-out of job status events to subscribed listeners (e.g. SSE streams)."""
+
+    def __init__(self):
+        """Initialize event hub."""
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """
+        Register a listener for a job.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Queue receiving the job's status events
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        """
+        Remove a listener registered with `subscribe`.
+
+        Args:
+            job_id: Job identifier
+            queue: Queue returned by `subscribe`
+        """
+        queues = self._subscribers.get(job_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: Dict[str, Any]):
+        """
+        Deliver an event to every listener of a job.
+
+        Args:
+            job_id: Job identifier
+            event: Event payload
+        """
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(event)
+
+
+# Global event hub
+job_events = JobEvents()
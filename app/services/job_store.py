@@ -0,0 +1,328 @@
+"""
+Research job storage.
+
+Jobs are persisted in PostgreSQL (via asyncpg) when a postgres
+``DATABASE_URL`` is configured, so that every API worker shares the same
+view of the jobs table and nothing is lost on restart. Without a database
+the store keeps jobs in process-local TTL caches, which is what tests and
+local development use: job status is kept for a day, the (much larger)
+report data for an hour, so memory stays bounded in long-running
+processes.
+"""
+from typing import Dict, Any, Optional, List, Tuple
+from datetime import datetime, timezone
+from itertools import islice
+import asyncio
+import json
+import time
+import uuid
+
+from cachetools import TTLCache
+
+from app.config import settings
+from app.utils.logger import app_logger
+
+
+# Columns stored in the jobs table, in insert order
+JOB_COLUMNS = (
+    "job_id",
+    "status",
+    "query",
+    "created_at",
+    "completed_at",
+    "google_doc_url",
+    "summary",
+    "error_message",
+    "report_data",
+)
+
+# Columns returned when listing jobs (the heavy report is left out)
+LIST_COLUMNS = tuple(c for c in JOB_COLUMNS if c != "report_data")
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id uuid PRIMARY KEY,
+    status text NOT NULL,
+    query text NOT NULL,
+    created_at timestamptz NOT NULL,
+    completed_at timestamptz,
+    google_doc_url text,
+    summary text,
+    error_message text,
+    report_data jsonb
+);
+CREATE INDEX IF NOT EXISTS jobs_created_at_idx ON jobs (created_at DESC);
+"""
+
+UPSERT_JOB = """
+INSERT INTO jobs ({columns})
+VALUES ({placeholders})
+ON CONFLICT (job_id) DO UPDATE SET {updates}
+""".format(
+    columns=", ".join(JOB_COLUMNS),
+    placeholders=", ".join(f"${i}" for i in range(1, len(JOB_COLUMNS) + 1)),
+    updates=", ".join(f"{c} = EXCLUDED.{c}" for c in JOB_COLUMNS[1:]),
+)
+
+
+# Job timestamps are taken from the monotonic clock (``*_at_ns`` fields) and
+# only turned into wall-clock datetimes when stored in the database or read
+# back out. The offset is captured once, so derived times never jump
+# backwards when the system clock is adjusted.
+EPOCH_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+# (monotonic field, datetime column)
+TIMESTAMP_FIELDS = (
+    ("created_at_ns", "created_at"),
+    ("completed_at_ns", "completed_at"),
+)
+
+
+def timestamp_ns() -> int:
+    """Return the current monotonic timestamp for a job field."""
+    return time.monotonic_ns()
+
+
+def ns_to_datetime(ns: Optional[int]) -> Optional[datetime]:
+    """
+    Convert a monotonic timestamp to a UTC wall-clock datetime.
+    
+    Args:
+        ns: Value returned by `timestamp_ns`, or None
+        
+    Returns:
+        Timezone-aware datetime, or None
+    """
+    if ns is None:
+        return None
+    return datetime.fromtimestamp((ns + EPOCH_OFFSET_NS) / 1e9, tz=timezone.utc)
+
+
+def _with_datetimes(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace monotonic ``*_at_ns`` fields with their datetime columns."""
+    fields = dict(fields)
+    for ns_field, column in TIMESTAMP_FIELDS:
+        if ns_field in fields:
+            fields[column] = ns_to_datetime(fields.pop(ns_field))
+    return fields
+
+
+def is_postgres_url(url: str) -> bool:
+    """Return True if the URL points at a PostgreSQL database."""
+    return url.startswith(("postgres://", "postgresql://"))
+
+
+async def _init_connection(conn):
+    """Decode/encode jsonb columns as Python objects."""
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=lambda value: json.dumps(value, default=str),
+        decoder=json.loads,
+        schema="pg_catalog",
+    )
+
+
+async def create_pool(dsn: str, min_size: int = 4, max_size: int = 20):
+    """
+    Create an asyncpg connection pool for the jobs table.
+
+    Args:
+        dsn: PostgreSQL connection string
+        min_size: Minimum number of pooled connections
+        max_size: Maximum number of pooled connections
+
+    Returns:
+        asyncpg connection pool
+    """
+    import asyncpg
+
+    return await asyncpg.create_pool(
+        dsn,
+        min_size=min_size,
+        max_size=max_size,
+        init=_init_connection,
+    )
+
+
+def _row_to_job(row) -> Dict[str, Any]:
+    """Convert a database row into a job dictionary."""
+    job = dict(row)
+    # Same dash-less form the API hands out
+    job["job_id"] = job["job_id"].hex
+    return job
+
+
+class JobStore:
+    """Storage for research jobs backed by PostgreSQL or an in-memory dict."""
+
+    def __init__(self):
+        """Initialize job store."""
+        self.pool = None
+        # Status fields and report data are cached separately so the heavy
+        # reports can expire long before the job itself.
+        self._jobs: TTLCache = TTLCache(
+            maxsize=settings.job_cache_max_size,
+            ttl=settings.job_cache_ttl_seconds
+        )
+        # Job ids in creation order (dicts keep insertion order and can be
+        # walked backwards, TTL caches can't); pruned by `expire`
+        self._job_order: Dict[str, None] = {}
+        self._reports: TTLCache = TTLCache(
+            maxsize=settings.report_cache_max_size,
+            ttl=settings.report_cache_ttl_seconds
+        )
+
+    async def attach(self, pool):
+        """
+        Switch the store to a PostgreSQL connection pool.
+
+        Args:
+            pool: asyncpg connection pool
+        """
+        async with pool.acquire() as conn:
+            await conn.execute(JOBS_SCHEMA)
+        self.pool = pool
+        app_logger.info("Job store using PostgreSQL")
+
+    def detach(self):
+        """Fall back to in-memory storage (used on shutdown)."""
+        self.pool = None
+
+    async def create(self, job: Dict[str, Any]):
+        """
+        Store a new job (or overwrite an existing one).
+
+        Args:
+            job: Job dictionary keyed by column name (timestamps as
+                ``created_at_ns`` / ``completed_at_ns``)
+        """
+        if self.pool is None:
+            job = dict(job)
+            report_data = job.pop("report_data", None)
+            if report_data is not None:
+                self._reports[job["job_id"]] = report_data
+            self._jobs[job["job_id"]] = job
+            self._job_order[job["job_id"]] = None
+            return
+
+        job = _with_datetimes(job)
+        await self.pool.execute(
+            UPSERT_JOB,
+            *(job.get(column) for column in JOB_COLUMNS)
+        )
+
+    async def update(self, job_id: str, **fields: Any):
+        """
+        Update fields of an existing job.
+
+        Args:
+            job_id: Job identifier
+            **fields: Column values to set
+        """
+        if self.pool is None:
+            report_data = fields.pop("report_data", None)
+            if report_data is not None:
+                self._reports[job_id] = report_data
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+            return
+
+        fields = _with_datetimes(fields)
+        columns = [c for c in fields if c in JOB_COLUMNS and c != "job_id"]
+        if not columns:
+            return
+        assignments = ", ".join(f"{c} = ${i}" for i, c in enumerate(columns, 2))
+        await self.pool.execute(
+            f"UPDATE jobs SET {assignments} WHERE job_id = $1",
+            job_id,
+            *(fields[c] for c in columns)
+        )
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a job by ID.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Job dictionary, or None if it does not exist
+        """
+        if self.pool is None:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return _with_datetimes({**job, "report_data": self._reports.get(job_id)})
+
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            # Malformed IDs can never match a uuid primary key
+            app_logger.debug("Job lookup for malformed ID {!r}", job_id)
+            return None
+
+        row = await self.pool.fetchrow(
+            "SELECT * FROM jobs WHERE job_id = $1", job_id
+        )
+        return _row_to_job(row) if row else None
+
+    async def list_jobs(self, limit: int, offset: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        List jobs, newest first.
+
+        Args:
+            limit: Maximum number of jobs to return
+            offset: Offset for pagination
+
+        Returns:
+            Tuple of (total job count, page of jobs)
+        """
+        if self.pool is None:
+            # Walk the creation-order index backwards, newest first, and stop
+            # after the requested page instead of copying or sorting every
+            # job. No await happens here, so no other task can modify the
+            # index mid-walk; ids of evicted jobs are skipped.
+            self._jobs.expire()
+            jobs = filter(None, map(self._jobs.get, reversed(self._job_order)))
+            return len(self._jobs), [
+                {column: job.get(column) for column in LIST_COLUMNS}
+                for job in map(_with_datetimes, islice(jobs, offset, offset + limit))
+            ]
+
+        async with self.pool.acquire() as conn:
+            total = await conn.fetchval("SELECT count(*) FROM jobs")
+            rows = await conn.fetch(
+                f"SELECT {', '.join(LIST_COLUMNS)} FROM jobs "
+                "ORDER BY created_at DESC LIMIT $1 OFFSET $2",
+                limit,
+                offset
+            )
+
+        return total, [_row_to_job(row) for row in rows]
+
+    def expire(self):
+        """Drop expired jobs and reports from the in-memory caches."""
+        self._jobs.expire()
+        self._reports.expire()
+        self._job_order = dict.fromkeys(
+            job_id for job_id in self._job_order if job_id in self._jobs
+        )
+
+    async def purge_loop(self, interval: float = 60.0):
+        """
+        Periodically expire in-memory entries (run as a background task).
+        
+        TTL caches only expire entries when they are modified, so without
+        this an idle process would keep old reports alive.
+        
+        Args:
+            interval: Seconds between purges
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.expire()
+
+
+# Global store instance
+job_store = JobStore()
@@ -0,0 +1,146 @@
+"""
+OpenAI Batch API client for non-interactive LLM workloads.
+
+Batch jobs are billed at half the price of synchronous calls and don't
+count against the per-minute rate limits, at the cost of latency
+(minutes, up to the 24h completion window). Only use this for work
+nobody is waiting on, such as offline reports summarizing many sources.
+"""
+from typing import Any, Dict, List, Optional
+import time
+
+import orjson
+
+from app.utils.logger import app_logger
+
+
+# Chat completions endpoint used for every batch request
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+
+# Batch states after which polling stops
+FINAL_BATCH_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+def build_batch_file(
+    message_lists: List[List[Dict[str, str]]],
+    model: str,
+    temperature: float
+) -> bytes:
+    """
+    Serialize chat requests to the Batch API's JSONL input format.
+
+    Args:
+        message_lists: Chat messages (role/content dicts) per request
+        model: Model name
+        temperature: Sampling temperature
+
+    Returns:
+        JSONL file content; each request's custom_id is its list index
+    """
+    return b"\n".join(
+        orjson.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": CHAT_COMPLETIONS_ENDPOINT,
+            "body": {"model": model, "messages": messages, "temperature": temperature}
+        })
+        for i, messages in enumerate(message_lists)
+    )
+
+
+def parse_batch_output(content: bytes, count: int) -> List[Optional[str]]:
+    """
+    Map a batch output file back to request order.
+
+    Args:
+        content: Output file content (JSONL)
+        count: Number of submitted requests
+
+    Returns:
+        Response text per request, or None for requests that failed
+    """
+    results: List[Optional[str]] = [None] * count
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        record = orjson.loads(line)
+        response = record.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        results[int(record["custom_id"])] = response["body"]["choices"][0]["message"]["content"]
+    return results
+
+
+def wait_for_batch(
+    client: Any,
+    batch_id: str,
+    max_wait: float = 86400,
+    initial_delay: float = 5.0,
+    max_delay: float = 60.0
+) -> Any:
+    """
+    Poll a batch with exponential backoff until it reaches a final state.
+
+    Args:
+        client: openai.OpenAI client
+        batch_id: Batch identifier
+        max_wait: Seconds to wait before giving up
+        initial_delay: First polling interval in seconds
+        max_delay: Longest polling interval in seconds
+
+    Returns:
+        Final batch object
+
+    Raises:
+        TimeoutError: If the batch is still running after `max_wait`
+    """
+    delay = initial_delay
+    deadline = time.monotonic() + max_wait
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in FINAL_BATCH_STATUSES:
+            return batch
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Batch {batch_id} still {batch.status} after {max_wait}s")
+        time.sleep(delay)
+        delay = min(delay * 1.5, max_delay)
+
+
+def run_chat_batch(
+    client: Any,
+    message_lists: List[List[Dict[str, str]]],
+    model: str,
+    temperature: float,
+    max_wait: float = 86400
+) -> List[Optional[str]]:
+    """
+    Run chat completions through the Batch API and wait for the results.
+
+    Args:
+        client: openai.OpenAI client
+        message_lists: Chat messages (role/content dicts) per request
+        model: Model name
+        temperature: Sampling temperature
+        max_wait: Seconds to wait for the batch
+
+    Returns:
+        Response text per request (None where a request failed)
+    """
+    input_file = client.files.create(
+        file=("batch.jsonl", build_batch_file(message_lists, model, temperature)),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=CHAT_COMPLETIONS_ENDPOINT,
+        completion_window="24h"
+    )
+    app_logger.info("Submitted LLM batch {} with {} request(s)", batch.id, len(message_lists))
+
+    batch = wait_for_batch(client, batch.id, max_wait=max_wait)
+    if batch.status != "completed" or not batch.output_file_id:
+        app_logger.error("LLM batch {} ended as {}", batch.id, batch.status)
+        return [None] * len(message_lists)
+
+    output = client.files.content(batch.output_file_id)
+    return parse_batch_output(output.read(), len(message_lists))
@@ -0,0 +1,153 @@
+"""
+Micro-batching gateway for LLM calls.
+
+Research jobs run their nodes independently, so without coordination the
+LLM backend sees many small one-off requests. The batcher collects prompts
+submitted within a short window (or until the batch is full) and sends them
+together with `Runnable.batch`. That is still one API request per prompt
+(run concurrently), but they arrive at the same time, so servers with
+continuous batching (vLLM, TGI) can schedule them together.
+"""
+from typing import Any, Deque, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import threading
+import time
+
+try:
+    from openai import RateLimitError  # type: ignore
+except Exception:
+    RateLimitError = None  # type: ignore
+
+from app.config import settings
+from app.utils.error_handlers import LLMRateLimitError
+from app.utils.logger import app_logger
+
+
+class LLMBatcher:
+    """Groups concurrent LLM requests and sends each group at once."""
+
+    def __init__(
+        self,
+        llm: Any,
+        window_ms: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            llm: LangChain runnable (e.g. ChatOpenAI) supporting `.batch`
+            window_ms: How long to wait for more prompts before flushing
+            max_batch_size: Flush immediately once this many prompts are queued
+            max_concurrency: Maximum concurrent requests within a batch, and
+                maximum number of batches in flight
+        """
+        self.llm = llm
+        self.window = (window_ms if window_ms is not None else settings.llm_batch_window_ms) / 1000
+        self.max_batch_size = max_batch_size or settings.llm_batch_max_size
+        self.max_concurrency = max_concurrency or settings.max_concurrent_llm_calls
+        self._pending: Deque[Tuple[Any, Future]] = deque()
+        self._condition = threading.Condition()
+        self._collector: Optional[threading.Thread] = None
+        # Prompts arriving more than a window apart form separate batches,
+        # which must not queue behind a slow one
+        self._dispatcher = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="llm-batch"
+        )
+
+    def submit_future(self, messages: Any) -> Future:
+        """
+        Queue a prompt for the next batch.
+
+        Args:
+            messages: LLM input (list of messages or a prompt value)
+
+        Returns:
+            Future resolving to the LLM response message
+        """
+        future: Future = Future()
+        with self._condition:
+            self._pending.append((messages, future))
+            if self._collector is None:
+                self._collector = threading.Thread(
+                    target=self._collect, name="llm-batch-collector", daemon=True
+                )
+                self._collector.start()
+            self._condition.notify()
+        return future
+
+    def submit(self, messages: Any) -> Any:
+        """
+        Run a prompt through the batcher and wait for its response.
+
+        Args:
+            messages: LLM input (list of messages or a prompt value)
+
+        Returns:
+            LLM response message
+        """
+        return self.submit_future(messages).result()
+
+    async def asubmit(self, messages: Any) -> Any:
+        """
+        Run a prompt through the batcher without blocking the event loop.
+
+        Args:
+            messages: LLM input (list of messages or a prompt value)
+
+        Returns:
+            LLM response message
+        """
+        return await asyncio.wrap_future(self.submit_future(messages))
+
+    def _collect(self):
+        """Collector loop: gather prompts into batches and dispatch them."""
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+
+                # Give concurrent callers a short window to join the batch
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                batch = [
+                    self._pending.popleft()
+                    for _ in range(min(len(self._pending), self.max_batch_size))
+                ]
+
+            self._dispatcher.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[Tuple[Any, Future]]):
+        """
+        Send one batch's prompts to the LLM concurrently and resolve its futures.
+
+        Args:
+            batch: (input, future) pairs
+        """
+        inputs = [messages for messages, _ in batch]
+        app_logger.debug("Dispatching LLM batch of {} prompt(s)", len(inputs))
+        try:
+            responses = self.llm.batch(
+                inputs,
+                config={"max_concurrency": self.max_concurrency},
+                return_exceptions=True
+            )
+        except Exception as e:
+            responses = [e] * len(batch)
+
+        for (_, future), response in zip(batch, responses):
+            if RateLimitError is not None and isinstance(response, RateLimitError):
+                # Keep the provider's response (and its traceback) out of the job
+                future.set_exception(LLMRateLimitError("LLM rate limit exceeded"))
+            elif isinstance(response, Exception):
+                future.set_exception(response)
+            else:
+                future.set_result(response)
@@ -0,0 +1,174 @@
+"""
+In-memory cache of LLM responses.
+
+Research workflows send the same prompts again and again (identical
+summarization templates for the same sources), so exact repeats are
+answered from memory instead of another LLM round trip. Only
+zero-temperature calls are cached: serving sampled responses from cache
+would silently make repeat calls deterministic.
+"""
+from typing import Any, Dict, Optional, Sequence
+import hashlib
+import json
+import threading
+
+from cachetools import TTLCache
+from langchain_core.caches import BaseCache
+
+from app.config import settings
+
+
+def cache_key(
+    model: str,
+    temperature: Optional[float],
+    system_message: Optional[str],
+    prompt: str
+) -> str:
+    """
+    Build the cache key for an LLM call.
+
+    Args:
+        model: Model name
+        temperature: Sampling temperature
+        system_message: Optional system message
+        prompt: User prompt
+
+    Returns:
+        Hex digest identifying the call
+    """
+    payload = json.dumps(
+        {"m": model, "t": temperature, "sys": system_message, "p": prompt},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """Thread-safe TTL cache of LLM responses with hit/miss counters."""
+
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached responses
+            ttl: Seconds a response stays cached
+        """
+        self._cache: TTLCache = TTLCache(
+            maxsize=max_size or settings.llm_response_cache_max_size,
+            ttl=ttl or settings.llm_response_cache_ttl_seconds
+        )
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from `cache_key`
+
+        Returns:
+            Cached response, or None
+        """
+        with self._lock:
+            value = self._cache.get(key)
+            self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        """
+        Store a response.
+
+        Args:
+            key: Key from `cache_key`
+            value: Response (text, or LangChain generations)
+        """
+        with self._lock:
+            self._cache[key] = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the cache's counters.
+
+        Returns:
+            Hits, misses and current size
+        """
+        with self._lock:
+            return {**self.stats, "size": len(self._cache)}
+
+
+class LangChainResponseCache(BaseCache):
+    """
+    LangChain LLM cache backed by an `LLMResponseCache`.
+
+    Installed with `set_llm_cache`, so the research nodes' ChatOpenAI calls
+    are cached too (LangChain only consults it for zero-temperature
+    models). Misses fall through to an optional persistent cache.
+    """
+
+    def __init__(self, cache: LLMResponseCache, backing: Optional[BaseCache] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache: In-memory response cache
+            backing: Persistent cache consulted on misses (e.g. SQLiteCache)
+        """
+        self.cache = cache
+        self.backing = backing
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        """
+        Build the in-memory cache key for a LangChain call.
+
+        Args:
+            prompt: Serialized prompt
+            llm_string: Serialized model parameters
+
+        Returns:
+            Hex digest identifying the call
+        """
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Any]]:
+        """
+        Look up cached generations.
+
+        Args:
+            prompt: Serialized prompt
+            llm_string: Serialized model parameters
+
+        Returns:
+            Cached generations, or None
+        """
+        key = self._key(prompt, llm_string)
+        generations = self.cache.get(key)
+        if generations is None and self.backing is not None:
+            generations = self.backing.lookup(prompt, llm_string)
+            if generations is not None:
+                self.cache.set(key, generations)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Any]):
+        """
+        Store generations.
+
+        Args:
+            prompt: Serialized prompt
+            llm_string: Serialized model parameters
+            return_val: Generations to cache
+        """
+        self.cache.set(self._key(prompt, llm_string), return_val)
+        if self.backing is not None:
+            self.backing.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any):
+        """Clear the persistent cache (in-memory entries expire on their own)."""
+        if self.backing is not None:
+            self.backing.clear(**kwargs)
+
+
+# Global cache instance
+llm_response_cache = LLMResponseCache()
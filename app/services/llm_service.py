@@ -1,7 +1,9 @@
 """
 LLM service wrapper for different providers.
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from functools import lru_cache
+import asyncio
 try:
     # Preferred modern lightweight wrapper if installed
     from langchain_openai import ChatOpenAI  # type: ignore
@@ -12,35 +14,20 @@ except ModuleNotFoundError:
     import openai
 
     class ChatOpenAI:
-        def __init__(self, model: str = "gpt-3.5-turbo", temperature: float = 0.0, api_key: str | None = None, max_retries: int = 3, **kwargs):
+        def __init__(self, model: str = "gpt-3.5-turbo", temperature: float = 0.0, api_key: str | None = None, max_retries: int = 3, base_url: str | None = None, **kwargs):
             if api_key:
                 openai.api_key = api_key
+            if base_url:
+                openai.api_base = base_url
             self.model = model
             self.temperature = temperature
             self.max_retries = max_retries
 
         def invoke(self, messages):
-            # Accept list of message-like objects; fall back to raw strings
-            payload = []
-            for m in messages:
-                try:
-                    role = getattr(m, 'type', None) or getattr(m, 'role', None)
-                    # map SystemMessage/HumanMessage to roles
-                    if role is None:
-                        # inspect class name
-                        role = m.__class__.__name__.lower()
-                        if 'system' in role:
-                            r = 'system'
-                        else:
-                            r = 'user'
-                    else:
-                        r = role
-                    content = getattr(m, 'content', str(m))
-                except Exception:
-                    r = 'user'
-                    content = str(m)
-                payload.append({"role": r if r in ("system", "user", "assistant") else "user", "content": content})
-
+            payload = [
+                {"role": _ROLE_MAP.get(type(m), "user"), "content": m.content}
+                for m in messages
+            ]
             resp = openai.ChatCompletion.create(model=self.model, messages=payload, temperature=self.temperature)
             text = resp['choices'][0]['message']['content']
 
@@ -49,6 +36,12 @@ except ModuleNotFoundError:
                     self.content = content
 
             return Response(text)
+
+        def batch(self, inputs, config=None):
+            return [self.invoke(messages) for messages in inputs]
+
+        async def ainvoke(self, messages):
+            return await asyncio.to_thread(self.invoke, messages)
 try:
     from langchain.schema import HumanMessage, SystemMessage
 except Exception:
@@ -61,10 +54,86 @@ except Exception:
     class SystemMessage:
         def __init__(self, content: str):
             self.content = content
+
+# Chat roles by message class (used by the openai compatibility wrapper)
+_ROLE_MAP = {SystemMessage: "system", HumanMessage: "user"}
+try:
+    from langchain.schema import AIMessage
+    _ROLE_MAP[AIMessage] = "assistant"
+except Exception:
+    pass
+try:
+    from openai import OpenAI  # type: ignore
+except ImportError:
+    # openai < 1.0 (used by the compatibility wrapper above)
+    OpenAI = None  # type: ignore
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 from app.config import settings
+from app.services.llm_batch import run_chat_batch
+from app.services.llm_cache import cache_key, llm_response_cache
 from app.utils.logger import app_logger
 
 
+# Default sampling temperature of the service's LLM
+DEFAULT_TEMPERATURE = 0.3
+
+# System message used for summaries
+SUMMARIZER_SYSTEM_MESSAGE = "You are a professional summarizer. Create concise, informative summaries."
+
+# One HTTP client (connection pool and SSL context) for the raw OpenAI
+# client. Not given to ChatOpenAI: langchain-openai 0.0.5 passes its
+# http_client to the async OpenAI client too, which needs an AsyncClient
+_http_client = httpx.Client(
+    limits=httpx.Limits(
+        max_keepalive_connections=20,
+        max_connections=100,
+        keepalive_expiry=30
+    )
+)
+
+
+@lru_cache(maxsize=1)
+def _get_openai_client() -> "OpenAI":
+    """Return the raw OpenAI client, creating it on first use."""
+    return OpenAI(
+        api_key=settings.openai_api_key,
+        base_url=settings.llm_base_url or None,
+        max_retries=3,
+        http_client=_http_client
+    )
+
+
+def _raw_openai_chat(
+    messages: List[Dict[str, str]],
+    model: str,
+    temperature: float
+) -> str:
+    """
+    Run a chat completion with the OpenAI client, bypassing LangChain.
+    
+    Args:
+        messages: Chat messages as role/content dicts
+        model: Model name
+        temperature: Sampling temperature
+        
+    Returns:
+        Response text
+    """
+    response = _get_openai_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature
+    )
+    return response.choices[0].message.content
+
+
+@lru_cache(maxsize=128)
+def _system_msg(text: str) -> SystemMessage:
+    """Return a (shared) system message, built once per distinct text."""
+    return SystemMessage(content=text)
+
+
 class LLMService:
     """Wrapper service for LLM operations."""
     
@@ -72,7 +141,10 @@ class LLMService:
         """Initialize LLM service."""
         self.model = settings.openai_model
         self.api_key = settings.openai_api_key
+        self.base_url = settings.llm_base_url or None
         self.llm = self._initialize_llm()
+        # LLM instances by temperature, so overrides reuse one client
+        self._llm_cache: Dict[float, ChatOpenAI] = {DEFAULT_TEMPERATURE: self.llm}
     
     def _initialize_llm(self) -> ChatOpenAI:
         """
@@ -93,26 +165,90 @@ class LLMService:
             try:
                 llm = ChatOpenAI(
                     model=m,
-                    temperature=0.3,
+                    temperature=DEFAULT_TEMPERATURE,
                     api_key=self.api_key,
+                    base_url=self.base_url,
                     max_retries=3
                 )
-                app_logger.info(f"LLM service initialized with model: {m}")
+                app_logger.info("LLM service initialized with model: {}", m)
                 # remember which model actually worked
                 self.model = m
                 return llm
             except Exception as e:
                 # Keep trying other fallback models when possible.
-                app_logger.warning(f"Failed to initialize ChatOpenAI with model '{m}': {e}")
+                app_logger.warning("Failed to initialize ChatOpenAI with model '{}': {}", m, e)
                 last_exc = e
 
         # If we reach here, none of the models worked.
         app_logger.error(
-            f"Error initializing LLM with tried models {tried_models}: {last_exc}"
+            "Error initializing LLM with tried models {}: {}", tried_models, last_exc
         )
         # Raise the last exception so callers can handle it.
         raise last_exc
     
+    def _get_llm(self, temperature: float) -> ChatOpenAI:
+        """
+        Return the LLM for a temperature, creating it on first use.
+        
+        Args:
+            temperature: Sampling temperature
+            
+        Returns:
+            ChatOpenAI instance
+        """
+        llm = self._llm_cache.get(temperature)
+        if llm is None:
+            llm = ChatOpenAI(
+                model=self.model,
+                temperature=temperature,
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=3
+            )
+            self._llm_cache[temperature] = llm
+        return llm
+    
+    def _build_messages(self, prompt: str, system_message: Optional[str]) -> List[Any]:
+        """
+        Build the chat messages for a prompt.
+        
+        Args:
+            prompt: User prompt
+            system_message: Optional system message
+            
+        Returns:
+            List of messages
+        """
+        if system_message:
+            return [_system_msg(system_message), HumanMessage(content=prompt)]
+        return [HumanMessage(content=prompt)]
+    
+    def _lookup_cached(
+        self,
+        prompts: List[str],
+        system_message: Optional[str],
+        temperature: Optional[float]
+    ) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """
+        Look prompts up in the response cache.
+        
+        Only zero-temperature calls are served from cache; caching sampled
+        responses would make repeat calls deterministic.
+        
+        Args:
+            prompts: User prompts
+            system_message: Optional system message
+            temperature: Optional temperature override
+            
+        Returns:
+            Tuple of (cached response or None, cache key or None) per prompt
+        """
+        if (DEFAULT_TEMPERATURE if temperature is None else temperature) != 0:
+            return [None] * len(prompts), [None] * len(prompts)
+        
+        keys = [cache_key(self.model, temperature, system_message, p) for p in prompts]
+        return [llm_response_cache.get(key) for key in keys], keys
+    
     def generate_text(
         self,
         prompt: str,
@@ -131,30 +267,116 @@ class LLMService:
             Generated text
         """
         try:
-            messages = []
+            (cached,), (key,) = self._lookup_cached([prompt], system_message, temperature)
+            if cached is not None:
+                return cached
             
-            if system_message:
-                messages.append(SystemMessage(content=system_message))
-            
-            messages.append(HumanMessage(content=prompt))
+            messages = self._build_messages(prompt, system_message)
             
             # Use custom temperature if provided
-            if temperature is not None:
-                llm = ChatOpenAI(
-                    model=self.model,
-                    temperature=temperature,
-                    api_key=self.api_key
-                )
-                response = llm.invoke(messages)
-            else:
-                response = self.llm.invoke(messages)
+            llm = self.llm if temperature is None else self._get_llm(temperature)
+            response = llm.invoke(messages)
             
+            if key is not None:
+                llm_response_cache.set(key, response.content)
             return response.content
             
         except Exception as e:
-            app_logger.error(f"Error generating text: {str(e)}")
+            app_logger.error("Error generating text: {}", e)
             raise
     
+    def generate_batch(
+        self,
+        prompts: List[str],
+        system_message: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: Optional[int] = None
+    ) -> List[str]:
+        """
+        Generate text for several prompts with concurrent LLM calls.
+        
+        Args:
+            prompts: User prompts
+            system_message: Optional system message shared by all prompts
+            temperature: Optional temperature override
+            max_concurrency: Maximum concurrent LLM calls
+            
+        Returns:
+            Generated text per prompt, in input order
+        """
+        results, keys = self._lookup_cached(prompts, system_message, temperature)
+        misses = [i for i, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+        
+        llm = self.llm if temperature is None else self._get_llm(temperature)
+        responses = llm.batch(
+            [self._build_messages(prompts[i], system_message) for i in misses],
+            config={"max_concurrency": max_concurrency or settings.max_concurrent_llm_calls}
+        )
+        
+        for i, response in zip(misses, responses):
+            results[i] = response.content
+            if keys[i] is not None:
+                llm_response_cache.set(keys[i], response.content)
+        return results
+    
+    async def agenerate_batch(
+        self,
+        prompts: List[str],
+        system_message: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: Optional[int] = None
+    ) -> List[str]:
+        """
+        Generate text for several prompts concurrently from async code.
+        
+        Args:
+            prompts: User prompts
+            system_message: Optional system message shared by all prompts
+            temperature: Optional temperature override
+            max_concurrency: Maximum concurrent LLM calls
+            
+        Returns:
+            Generated text per prompt, in input order
+        """
+        results, keys = self._lookup_cached(prompts, system_message, temperature)
+        llm = self.llm if temperature is None else self._get_llm(temperature)
+        semaphore = asyncio.Semaphore(max_concurrency or settings.max_concurrent_llm_calls)
+        
+        async def generate(i: int):
+            async with semaphore:
+                response = await llm.ainvoke(self._build_messages(prompts[i], system_message))
+            results[i] = response.content
+            if keys[i] is not None:
+                llm_response_cache.set(keys[i], response.content)
+        
+        await asyncio.gather(*(generate(i) for i, result in enumerate(results) if result is None))
+        return results
+    
+    def _summary_prompt(self, text: str, max_length: int) -> str:
+        """Build the user prompt asking for a summary of `text`."""
+        return f"Summarize the following text in {max_length} words or less:\n\n{text}"
+    
+    def _summary_messages(self, prompt: str) -> List[Dict[str, str]]:
+        """Build the raw chat messages for a summarization prompt."""
+        return [
+            {"role": "system", "content": SUMMARIZER_SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _summarize_raw(self, prompt: str) -> str:
+        """
+        Summarize with a direct OpenAI call.
+        
+        Args:
+            prompt: Summarization prompt
+            
+        Returns:
+            Summary text
+        """
+        return _raw_openai_chat(self._summary_messages(prompt), self.model, DEFAULT_TEMPERATURE)
+    
     def summarize_text(self, text: str, max_length: int = 200) -> str:
         """
         Summarize long text.
@@ -166,15 +388,87 @@ class LLMService:
         Returns:
             Summarized text
         """
+        return self.summarize_texts([text], max_length)[0]
+    
+    def summarize_texts(self, texts: List[str], max_length: int = 200) -> List[str]:
+        """
+        Summarize several texts with concurrent LLM calls.
+        
+        Args:
+            texts: Texts to summarize
+            max_length: Maximum summary length in words
+            
+        Returns:
+            Summary per text, in input order
+        """
         try:
-            prompt = f"Summarize the following text in {max_length} words or less:\n\n{text}"
-            system_message = "You are a professional summarizer. Create concise, informative summaries."
+            prompts = [self._summary_prompt(text, max_length) for text in texts]
+            if OpenAI is None:
+                return self.generate_batch(prompts, SUMMARIZER_SYSTEM_MESSAGE)
+            
+            # Summaries need nothing from LangChain, so they go straight to
+            # the OpenAI client (sharing the response cache)
+            results, keys = self._lookup_cached(prompts, SUMMARIZER_SYSTEM_MESSAGE, None)
+            misses = [i for i, result in enumerate(results) if result is None]
+            if misses:
+                workers = min(len(misses), settings.max_concurrent_llm_calls)
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    summaries = pool.map(self._summarize_raw, (prompts[i] for i in misses))
+                    for i, summary in zip(misses, summaries):
+                        results[i] = summary
+                        if keys[i] is not None:
+                            llm_response_cache.set(keys[i], summary)
+            return results
             
-            return self.generate_text(prompt, system_message)
+        except Exception as e:
+            app_logger.error("Error summarizing text: {}", e)
+            return [text[:500] + "..." for text in texts]  # Fallback to truncation
+    
+    def summarize_texts_offline(self, texts: List[str], max_length: int = 200) -> List[str]:
+        """
+        Summarize many texts through the OpenAI Batch API.
+        
+        Half the cost of `summarize_texts` and not subject to rate limits,
+        but blocks for minutes (up to hours), so only for non-interactive
+        work. Falls back to `summarize_texts` unless ALLOW_BATCH_API is set.
+        
+        Args:
+            texts: Texts to summarize
+            max_length: Maximum summary length in words
             
+        Returns:
+            Summary per text, in input order
+        """
+        if not settings.allow_batch_api or OpenAI is None:
+            return self.summarize_texts(texts, max_length)
+        
+        try:
+            prompts = [self._summary_prompt(text, max_length) for text in texts]
+            results, keys = self._lookup_cached(prompts, SUMMARIZER_SYSTEM_MESSAGE, None)
+            misses = [i for i, result in enumerate(results) if result is None]
+            if misses:
+                summaries = run_chat_batch(
+                    _get_openai_client(),
+                    [self._summary_messages(prompts[i]) for i in misses],
+                    self.model,
+                    DEFAULT_TEMPERATURE
+                )
+                for i, summary in zip(misses, summaries):
+                    if summary is not None:
+                        results[i] = summary
+                        if keys[i] is not None:
+                            llm_response_cache.set(keys[i], summary)
         except Exception as e:
-            app_logger.error(f"Error summarizing text: {str(e)}")
-            return text[:500] + "..."  # Fallback to truncation
+            app_logger.error("Error summarizing text in batch: {}", e)
+            return self.summarize_texts(texts, max_length)
+        
+        # Requests the batch failed go through the synchronous path
+        failed = [i for i, result in enumerate(results) if result is None]
+        if failed:
+            app_logger.warning("Retrying {} failed batch request(s) synchronously", len(failed))
+            for i, summary in zip(failed, self.summarize_texts([texts[i] for i in failed], max_length)):
+                results[i] = summary
+        return results
 
 
 # Global service instance
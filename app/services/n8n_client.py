@@ -1,21 +1,189 @@
 """
 n8n webhook client for workflow automation.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set, Tuple
 import aiohttp
 import asyncio
+import concurrent.futures
+import gzip
+import orjson
+import threading
+import weakref
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 from app.utils.logger import app_logger
 from app.config import settings
 
 
+# Request bodies larger than this (bytes) are sent gzip-compressed
+GZIP_MIN_SIZE = 4096
+
+# Webhook responses worth retrying (rate limited / temporarily unavailable)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Webhook attempts per call and the longest backoff between two of them
+MAX_ATTEMPTS = 5
+MAX_RETRY_WAIT = 10
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    """
+    Create a pooled HTTP session for outgoing webhook calls.
+    
+    Returns:
+        aiohttp session with keep-alive connection pooling
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=settings.http_max_connections,
+            limit_per_host=settings.http_max_connections_per_host,
+            keepalive_timeout=30
+        )
+    )
+
+
 class N8NClient:
     """Client for triggering n8n workflows via webhooks."""
     
-    def __init__(self):
-        """Initialize n8n client."""
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        """
+        Initialize n8n client.
+        
+        Args:
+            session: Shared HTTP session to reuse pooled connections; the
+                client opens (and reuses) its own when not provided
+        """
         self.webhook_url = settings.n8n_webhook_url
         self.api_key = settings.n8n_api_key
         self.timeout = 30
+        self.session = session
+        
+        # Sessions opened by the client itself, one per event loop
+        self._own_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+        
+        # Webhook calls started by `trigger_workflow_background` (strong
+        # references, so running tasks aren't garbage collected)
+        self._pending: Set[asyncio.Task] = set()
+        
+        # Background loop running `trigger_workflow_sync` calls
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_loop_lock = threading.Lock()
+        
+        # Per-request constants
+        self._headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            self._headers["Authorization"] = f"Bearer {self.api_key}"
+        self._gzip_headers = {**self._headers, "Content-Encoding": "gzip"}
+        self._client_timeout = aiohttp.ClientTimeout(total=self.timeout)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Return the HTTP session to send webhook calls with.
+        
+        Returns:
+            The shared session if one was provided (and this is not a
+            `trigger_workflow_sync` call), otherwise a pooled session
+            owned by this client for the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        if self.session is not None and loop is not self._sync_loop:
+            return self.session
+        
+        session = self._own_sessions.get(loop)
+        if session is None or session.closed:
+            session = create_http_session()
+            self._own_sessions[loop] = session
+        return session
+    
+    async def warm_up(self):
+        """
+        Open a pooled connection to the webhook host ahead of the first
+        call. Best effort: any error is ignored.
+        """
+        if not self.webhook_url:
+            return
+        try:
+            session = await self._get_session()
+            async with session.head(self.webhook_url, timeout=aiohttp.ClientTimeout(total=2)):
+                pass
+        except Exception:
+            pass
+    
+    def _get_sync_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the background event loop, starting it on first use."""
+        with self._sync_loop_lock:
+            if self._sync_loop is None:
+                self._sync_loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._sync_loop.run_forever,
+                    name="n8n-client-loop",
+                    daemon=True
+                ).start()
+            return self._sync_loop
+    
+    async def close(self):
+        """
+        Wait for background webhook calls, then close the sessions opened
+        by the client, if any.
+        """
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        
+        running = asyncio.get_running_loop()
+        for loop, session in list(self._own_sessions.items()):
+            if session.closed:
+                continue
+            if loop is running:
+                await session.close()
+            elif loop.is_running():
+                # Sessions must be closed on the loop they belong to
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(session.close(), loop)
+                )
+        self._own_sessions.clear()
+    
+    @retry(
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        wait=wait_random_exponential(min=0.5, max=MAX_RETRY_WAIT),
+        retry=(
+            retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError))
+            | retry_if_result(lambda result: result[0] in RETRY_STATUSES)
+        ),
+        # After the last attempt, return its status (or raise its error)
+        retry_error_callback=lambda retry_state: retry_state.outcome.result()
+    )
+    async def _post_once(
+        self,
+        body: bytes,
+        headers: Dict[str, str]
+    ) -> Tuple[int, Optional[Any]]:
+        """
+        POST a payload to the webhook, retried with jittered backoff.
+        
+        Args:
+            body: JSON-encoded (possibly gzipped) payload
+            headers: Request headers matching the body's encoding
+            
+        Returns:
+            Tuple of (HTTP status, decoded JSON body for 200 responses)
+        """
+        session = await self._get_session()
+        async with session.post(
+            self.webhook_url,
+            data=body,
+            headers=headers,
+            timeout=self._client_timeout
+        ) as response:
+            if response.status != 200:
+                return response.status, None
+            return response.status, orjson.loads(await response.read())
     
     async def trigger_workflow(
         self,
@@ -39,7 +207,7 @@ class N8NClient:
             return None
         
         try:
-            app_logger.info(f"Triggering n8n workflow for job {job_id}")
+            app_logger.info("Triggering n8n workflow for job {}", job_id)
             
             # Prepare payload
             payload = {
@@ -53,42 +221,59 @@ class N8NClient:
                 "summary": report_data.get("summary", "")
             }
             
-            # Set headers
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
+            # Encoded (and compressed, if large) once, then reused by every
+            # retry; level 1 gzip already shrinks JSON several times over
+            body = orjson.dumps(payload)
+            headers = self._headers
+            if len(body) > GZIP_MIN_SIZE:
+                body = gzip.compress(body, compresslevel=1)
+                headers = self._gzip_headers
+            status, response_data = await self._post_once(body, headers)
             
-            # Make async request
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.webhook_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.timeout)
-                ) as response:
-                    
-                    response_data = await response.json()
-                    
-                    if response.status == 200:
-                        app_logger.info(f"n8n workflow triggered successfully for job {job_id}")
-                        return response_data
-                    else:
-                        app_logger.error(f"n8n workflow trigger failed: {response.status}")
-                        return None
+            if status == 200:
+                app_logger.info("n8n workflow triggered successfully for job {}", job_id)
+                return response_data
+            else:
+                app_logger.error("n8n workflow trigger failed: {}", status)
+                return None
             
         except asyncio.TimeoutError:
-            app_logger.error(f"n8n webhook timeout for job {job_id}")
+            app_logger.error("n8n webhook timeout for job {}", job_id)
             return None
         except aiohttp.ClientError as e:
-            app_logger.error(f"n8n client error: {str(e)}")
+            app_logger.error("n8n client error: {}", e)
             return None
         except Exception as e:
-            app_logger.error(f"Error triggering n8n workflow: {str(e)}")
+            app_logger.error("Error triggering n8n workflow: {}", e)
             return None
     
+    def trigger_workflow_background(
+        self,
+        job_id: str,
+        google_doc_url: str,
+        report_data: Dict[str, Any]
+    ) -> asyncio.Task:
+        """
+        Trigger n8n workflow without waiting for the webhook call.
+        
+        The call (with its retries) runs as a task on the current event
+        loop; `close` waits for outstanding calls.
+        
+        Args:
+            job_id: Research job ID
+            google_doc_url: URL of the generated Google Doc
+            report_data: Additional report metadata
+            
+        Returns:
+            Task resolving to the n8n response or None on failure
+        """
+        task = asyncio.create_task(
+            self.trigger_workflow(job_id, google_doc_url, report_data)
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+    
     def trigger_workflow_sync(
         self,
         job_id: str,
@@ -98,6 +283,10 @@ class N8NClient:
         """
         Synchronous wrapper for triggering n8n workflow.
         
+        Blocks until the webhook call (including retries) finishes, or
+        gives up once every attempt and backoff could have run; any number
+        of threads may call it concurrently, sharing one loop.
+        
         Args:
             job_id: Research job ID
             google_doc_url: URL of the generated Google Doc
@@ -105,8 +294,36 @@ class N8NClient:
             
         Returns:
             n8n response or None on failure
+            
+        Raises:
+            RuntimeError: If called from a running event loop
         """
-        return asyncio.run(self.trigger_workflow(job_id, google_doc_url, report_data))
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # Blocking here would stall the caller's loop (and deadlock if
+            # it were the client's own loop)
+            raise RuntimeError(
+                "trigger_workflow_sync() called from a running event loop; "
+                "await trigger_workflow() instead"
+            )
+        
+        # Runs on a long-lived background loop, so no event loop is set up
+        # per call, the client's session is reused across calls, and this
+        # can be called from threads while another loop is running
+        future = asyncio.run_coroutine_threadsafe(
+            self.trigger_workflow(job_id, google_doc_url, report_data),
+            self._get_sync_loop()
+        )
+        timeout = MAX_ATTEMPTS * self.timeout + (MAX_ATTEMPTS - 1) * MAX_RETRY_WAIT + 5
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            app_logger.error("n8n workflow for job {} timed out after {}s", job_id, timeout)
+            return None
 
 
 # Global client instance
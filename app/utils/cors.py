@@ -0,0 +1,46 @@
+"""
+CORS middleware tuned for the API's request mix.
+"""
+from typing import Sequence
+
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class FastCORSMiddleware(CORSMiddleware):
+    """
+    CORSMiddleware with constant-time origin checks and bypassed paths.
+
+    Allowed origins are matched against a frozenset instead of scanning the
+    configured list, and requests under `skip_prefixes` (internal endpoints
+    such as probes, never called from a browser) skip CORS handling.
+    """
+
+    def __init__(self, app: ASGIApp, skip_prefixes: Sequence[str] = (), **kwargs):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            skip_prefixes: Path prefixes served without CORS handling
+            **kwargs: Arguments for CORSMiddleware
+        """
+        super().__init__(app, **kwargs)
+        self.allow_origins_set = frozenset(self.allow_origins)
+        self.skip_prefixes = tuple(skip_prefixes)
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        """Return True if the origin may access the API."""
+        if self.allow_all_origins or origin in self.allow_origins_set:
+            return True
+        return (
+            self.allow_origin_regex is not None
+            and self.allow_origin_regex.fullmatch(origin) is not None
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle a request, skipping CORS for bypassed paths."""
+        if scope["type"] == "http" and scope["path"].startswith(self.skip_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
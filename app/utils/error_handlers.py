@@ -2,11 +2,21 @@
 Error handling utilities.
 """
 from fastapi import Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
+from app.config import settings
 from app.utils.logger import app_logger
 
 
+# Body returned for unhandled exceptions (unless EXPOSE_ERROR_DETAILS is
+# set); built once and never mutated
+GENERIC_ERROR_BODY = {
+    "error": "Internal Server Error",
+    "message": "An unexpected error occurred. Please try again later.",
+    "detail": None
+}
+
+
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """
     Handle validation errors.
@@ -18,13 +28,14 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     Returns:
         JSON error response
     """
-    app_logger.error(f"Validation error: {exc.errors()}")
+    errors = exc.errors()
+    app_logger.error("Validation error: {}", errors)
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "error": "Validation Error",
-            "details": exc.errors(),
+            "details": errors,
             "body": exc.body
         }
     )
@@ -41,21 +52,39 @@ async def general_exception_handler(request: Request, exc: Exception):
     Returns:
         JSON error response
     """
-    app_logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
+    if settings.debug:
+        # Outermost boundary: the only place the full traceback is logged
+        app_logger.opt(exception=exc).error("Unhandled exception on {}", request.url.path)
+    else:
+        # Formatting tracebacks is the expensive part of the error path, so
+        # production logs get the exception type and message only
+        app_logger.error("Unhandled exception on {}: {!r}", request.url.path, exc)
+    
+    # Exception messages can leak internals, so clients only see them
+    # when explicitly enabled
+    if not settings.expose_error_details:
+        return ORJSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content=GENERIC_ERROR_BODY
+        )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={
-            "error": "Internal Server Error",
-            "message": "An unexpected error occurred. Please try again later.",
-            "detail": str(exc) if app_logger.level == "DEBUG" else None
-        }
+        content={**GENERIC_ERROR_BODY, "detail": str(exc)}
     )
 
 
 class ResearchAgentError(Exception):
     """Base exception for research agent errors."""
-    pass
+
+    # Longest message stored on a failed job
+    max_message_length = 200
+
+    @property
+    def short_message(self) -> str:
+        """First line of the error message, truncated for storage on the job."""
+        message = str(self.args[0]) if self.args else type(self).__name__
+        return message.split("\n", 1)[0][:self.max_message_length]
 
 
 class SearchError(ResearchAgentError):
@@ -73,6 +102,11 @@ class ReportGenerationError(ResearchAgentError):
     pass
 
 
+class LLMRateLimitError(ResearchAgentError):
+    """Exception raised when the LLM provider rejects calls for rate limiting."""
+    pass
+
+
 class GoogleDocsError(ResearchAgentError):
     """Exception raised for Google Docs errors."""
     pass
@@ -1,19 +1,48 @@
 """
 Logging configuration using loguru.
 """
+from typing import Optional, Tuple
+import os
 import sys
 from loguru import logger
 from pathlib import Path
 
 
-def setup_logger(log_level: str = "INFO", log_file: str = "logs/app.log"):
+# Arguments of the current configuration (None until first setup)
+_configured: Optional[Tuple] = None
+
+
+def setup_logger(
+    log_level: Optional[str] = None,
+    log_file: str = "logs/app.log",
+    enqueue: bool = True,
+    compression: Optional[str] = "zip"
+):
     """
     Configure application logger.
     
+    Records are formatted and written by a background thread when
+    `enqueue` is set, so request handlers never wait on log I/O.
+    Tracebacks are logged without variable values (`diagnose`), which is
+    also cheaper. Calling it again with the same arguments (e.g. on
+    repeated imports in tests) keeps the existing handlers.
+    
     Args:
-        log_level: Logging level (DEBUG, INFO, WARNING, ERROR)
+        log_level: Logging level (DEBUG, INFO, WARNING, ERROR); defaults to
+            the LOG_LEVEL environment variable, then INFO
         log_file: Path to log file
+        enqueue: Write records from a background thread
+        compression: Format rotated log files are compressed to (None
+            skips compression)
     """
+    global _configured
+    
+    log_level = log_level or os.getenv("LOG_LEVEL", "INFO")
+    config = (log_level, log_file, enqueue, compression)
+    if config == _configured:
+        return logger
+    _configured = config
+    
     # Remove default handler
     logger.remove()
     
@@ -26,7 +55,10 @@ def setup_logger(log_level: str = "INFO", log_file: str = "logs/app.log"):
         sys.stdout,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan> - <level>{message}</level>",
         level=log_level,
-        colorize=True
+        colorize=True,
+        enqueue=enqueue,
+        backtrace=False,
+        diagnose=False
     )
     
     # File handler with rotation
@@ -36,7 +68,10 @@ def setup_logger(log_level: str = "INFO", log_file: str = "logs/app.log"):
         level=log_level,
         rotation="10 MB",
         retention="30 days",
-        compression="zip"
+        compression=compression,
+        enqueue=enqueue,
+        backtrace=False,
+        diagnose=False
     )
     
     logger.info("Logger initialized")
@@ -0,0 +1,378 @@
+"""
+Research job tasks executed by ARQ workers.
+
+Run workers with::
+
+    arq app.workers.tasks.WorkerSettings
+
+When no Redis URL is configured the API falls back to running
+``process_research_job`` in-process via FastAPI background tasks.
+"""
+from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import sys
+
+import msgspec
+
+try:
+    from arq.connections import RedisSettings  # type: ignore
+    ARQ_AVAILABLE = True
+except Exception:
+    RedisSettings = None  # type: ignore
+    ARQ_AVAILABLE = False
+
+from app.config import settings
+from app.models.schemas import ResearchStatus
+from app.research_agent.state import ResearchState
+from app.services.job_events import job_events
+from app.services.job_store import job_store, create_pool, is_postgres_url, timestamp_ns
+from app.services.n8n_client import n8n_client, create_http_session
+from app.utils.error_handlers import GoogleDocsError, ResearchAgentError
+from app.utils.logger import app_logger
+
+# Sliding window over running research jobs: jobs beyond the limit stay
+# pending until a running one finishes
+job_semaphore = asyncio.Semaphore(settings.max_concurrent_jobs)
+
+# Threads for blocking calls made while processing a job (e.g. the Google
+# Docs client), so they never stall the event loop serving the API
+blocking_pool = ThreadPoolExecutor(
+    max_workers=settings.max_concurrent_jobs,
+    thread_name_prefix="research-job"
+)
+
+# Running (and recently finished) research by request key, so duplicate
+# queries share one run; results are None for failed runs
+inflight: Dict[str, "asyncio.Future[Optional[Dict[str, Any]]]"] = {}
+
+
+async def update_job(job_id: str, **fields: Any):
+    """
+    Persist job fields and notify status listeners.
+    
+    Args:
+        job_id: Job identifier
+        **fields: Job fields to update
+    """
+    await job_store.update(job_id, **fields)
+    job_events.publish(job_id, {"status": fields.get("status")})
+
+
+async def _discard_document(google_docs_service: Any, doc_future: "asyncio.Future"):
+    """
+    Delete the document created for a job that produced no report.
+    
+    Args:
+        google_docs_service: Google Docs service that created the document
+        doc_future: Pending result of `create_empty_document`
+    """
+    try:
+        doc = await doc_future
+    except Exception:
+        return
+    if doc:
+        await _delete_document(google_docs_service, doc["document_id"])
+
+
+async def _delete_document(google_docs_service: Any, document_id: str):
+    """
+    Delete a job's document, logging instead of raising on failure.
+    
+    Args:
+        google_docs_service: Google Docs service that created the document
+        document_id: Document to delete
+    """
+    try:
+        await asyncio.get_running_loop().run_in_executor(
+            blocking_pool, google_docs_service.delete_document, document_id
+        )
+    except Exception as e:
+        app_logger.warning("Could not delete document {}: {!r}", document_id, e)
+
+
+async def warm_up_research_clients():
+    """Load the research nodes and open the LLM connection off the event loop."""
+    def warm_up():
+        from app.research_agent.nodes import warm_up_llm
+        warm_up_llm()
+    
+    await asyncio.get_running_loop().run_in_executor(blocking_pool, warm_up)
+
+
+async def close_research_clients():
+    """Close the research tools' HTTP clients for the running event loop."""
+    # Only loaded once a job ran; importing it here would pull in the
+    # research tools just to close nothing
+    nodes = sys.modules.get("app.research_agent.nodes")
+    if nodes is not None:
+        await nodes.content_extractor.aclose()
+
+
+def research_key(state: ResearchState) -> str:
+    """
+    Key identifying equivalent research requests.
+    
+    Args:
+        state: Initial research state
+        
+    Returns:
+        Hash of the normalized query and the options affecting the report
+    """
+    query = " ".join(state.query.lower().split())
+    raw = f"{query}\x00{state.max_results}\x00{state.include_citations}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _forget_research(key: str, future: "asyncio.Future"):
+    """Drop a finished research result from the in-flight map."""
+    if inflight.get(key) is future:
+        del inflight[key]
+
+
+async def _complete_job(job_id: str, result: Dict[str, Any]):
+    """
+    Mark a job completed with the given research result.
+    
+    Args:
+        job_id: Job identifier
+        result: Research result (report fields and doc URL)
+    """
+    await update_job(
+        job_id,
+        status=ResearchStatus.COMPLETED,
+        completed_at_ns=timestamp_ns(),
+        google_doc_url=result.get("google_doc_url"),
+        summary=result.get("executive_summary", ""),
+        report_data=result
+    )
+
+
+async def process_research_job(job_id: str, state: ResearchState):
+    """
+    Background task to process research job.
+    
+    A job whose query matches one already running (or finished within
+    the dedup TTL) in this process reuses that research instead of
+    running it again. The Google Doc and the n8n workflow are always the
+    job's own, since equivalent queries may come from different users.
+    
+    Args:
+        job_id: Job identifier
+        state: Initial research state
+    """
+    async with job_semaphore:
+        try:
+            app_logger.info("Starting research job {}", job_id)
+            
+            loop = asyncio.get_running_loop()
+            
+            # Update job status
+            await update_job(job_id, status=ResearchStatus.PROCESSING)
+            
+            # Create the Google Doc (lazy import) while the research runs;
+            # its content is written once the report is ready
+            try:
+                from app.services.google_docs import get_google_docs_service
+            except ImportError:
+                google_docs_service = None
+            else:
+                google_docs_service = await loop.run_in_executor(
+                    blocking_pool, get_google_docs_service
+                )
+
+            doc_future = None
+            if google_docs_service:
+                doc_future = loop.run_in_executor(
+                    blocking_pool,
+                    google_docs_service.create_empty_document,
+                    f"Research Report - {job_id}"
+                )
+
+            try:
+                research = await _shared_research(job_id, state)
+            except Exception:
+                if doc_future is not None:
+                    await _discard_document(google_docs_service, doc_future)
+                raise
+            
+            # The research may come from another job: copy it, and keep this
+            # job's own requester
+            result = {**research, "user_id": state.user_id}
+
+            doc_result = None
+            if doc_future is not None:
+                try:
+                    doc_result = await doc_future
+                    if doc_result:
+                        await google_docs_service.awrite_report(
+                            doc_result["document_id"],
+                            result.get("report_markdown", ""),
+                            result.get("report_title")
+                        )
+                except Exception as e:
+                    # The report is still delivered without a document, so
+                    # transport and auth failures must not fail the job
+                    reason = e.short_message if isinstance(e, GoogleDocsError) else repr(e)
+                    app_logger.warning("Job {}: Google Docs export failed: {}", job_id, reason)
+                    if doc_result:
+                        await _delete_document(google_docs_service, doc_result["document_id"])
+                    doc_result = None
+
+            if doc_result:
+                result["google_doc_url"] = doc_result.get("url")
+            
+            # Update job with results
+            await _complete_job(job_id, result)
+            
+            if doc_result:
+                # Trigger n8n workflow in the background: the job is already
+                # complete and the webhook call retries on its own
+                n8n_client.trigger_workflow_background(
+                    job_id=job_id,
+                    google_doc_url=doc_result.get("url"),
+                    report_data={
+                        "title": result.get("report_title", ""),
+                        "query": result.get("query", ""),
+                        "created_at": str(result.get("started_at", "")),
+                        "user_id": result.get("user_id", ""),
+                        "citations": result.get("citations", []),
+                        "summary": result.get("executive_summary", "")
+                    }
+                )
+            
+            app_logger.info("Research job {} completed successfully", job_id)
+            
+        except ResearchAgentError as e:
+            # Expected failure: record a short message, no traceback
+            app_logger.warning("Research job {} failed: {}", job_id, e.short_message)
+            await update_job(
+                job_id,
+                status=ResearchStatus.FAILED,
+                completed_at_ns=timestamp_ns(),
+                error_message=e.short_message
+            )
+        except Exception as e:
+            app_logger.exception("Unexpected error processing job {}", job_id)
+            await update_job(
+                job_id,
+                status=ResearchStatus.FAILED,
+                completed_at_ns=timestamp_ns(),
+                error_message=f"Internal error ({type(e).__name__})"
+            )
+
+
+async def _shared_research(job_id: str, state: ResearchState) -> Dict[str, Any]:
+    """
+    Run the research workflow, or reuse an equivalent job's run.
+    
+    Args:
+        job_id: Job identifier
+        state: Initial research state
+        
+    Returns:
+        Research result (report fields, no per-job data); shared between
+        jobs, so callers must not modify it
+    """
+    key = research_key(state)
+    shared = inflight.get(key)
+    if shared is not None:
+        app_logger.info("Job {} reuses in-flight research for the same query", job_id)
+        result = await asyncio.shield(shared)
+        if result is not None:
+            return result
+        # The shared run failed; try again with this job
+
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    inflight[key] = future
+    result = None
+    try:
+        # Execute research workflow (lazy import); nodes run in worker
+        # threads, so the event loop stays free while the job runs
+        from app.research_agent.graph import research_graph
+
+        research = await research_graph.ainvoke(state)
+        
+        # Citation structs become plain dicts for storage and webhooks
+        research["citations"] = msgspec.to_builtins(research.get("citations", []))
+        result = research
+        return result
+    finally:
+        future.set_result(result)
+        if result is None:
+            # Never hand a failure to later requests
+            _forget_research(key, future)
+        else:
+            loop.call_later(settings.research_dedup_ttl_seconds, _forget_research, key, future)
+
+
+async def run_research(ctx: Dict[str, Any], job_id: str, state: ResearchState):
+    """
+    ARQ task entry point for a research job.
+    
+    Args:
+        ctx: ARQ worker context
+        job_id: Job identifier
+        state: Initial research state
+    """
+    await process_research_job(job_id, state)
+
+
+async def startup(ctx: Dict[str, Any]):
+    """
+    Worker startup hook: connect the job store to the shared database and
+    open the shared HTTP session.
+    
+    Args:
+        ctx: ARQ worker context
+    """
+    ctx["http"] = create_http_session()
+    n8n_client.session = ctx["http"]
+    await asyncio.gather(n8n_client.warm_up(), warm_up_research_clients())
+    
+    if is_postgres_url(settings.database_url):
+        ctx["pool"] = await create_pool(
+            settings.database_url,
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size
+        )
+        await job_store.attach(ctx["pool"])
+    else:
+        app_logger.warning(
+            "ARQ worker started without PostgreSQL; job updates will not reach the API"
+        )
+
+
+async def shutdown(ctx: Dict[str, Any]):
+    """
+    Worker shutdown hook: release the database pool and HTTP clients.
+    
+    Args:
+        ctx: ARQ worker context
+    """
+    # Background webhook retries still use the shared session
+    await n8n_client.close()
+    n8n_client.session = None
+    await ctx["http"].close()
+    await close_research_clients()
+    
+    pool = ctx.get("pool")
+    if pool is not None:
+        job_store.detach()
+        await pool.close()
+
+
+class WorkerSettings:
+    """ARQ worker configuration (``arq app.workers.tasks.WorkerSettings``)."""
+    functions = [run_research]
+    on_startup = startup
+    on_shutdown = shutdown
+    max_jobs = settings.arq_max_jobs
+    job_timeout = settings.arq_job_timeout
+    redis_settings = (
+        RedisSettings.from_dsn(settings.redis_url)
+        if ARQ_AVAILABLE and settings.redis_url
+        else None
+    )
@@ -1,7 +1,83 @@
-import streamlit as st
-import requests
+import json
 import time
 
+import httpx
+import streamlit as st
+
+API_URL = "http://localhost:8000"
+
+
+@st.cache_resource
+def get_client() -> httpx.Client:
+    """HTTP client shared across Streamlit reruns, so connections to the
+    backend are reused instead of re-opened on every interaction."""
+    return httpx.Client(
+        base_url=API_URL,
+        timeout=httpx.Timeout(30, connect=3),
+        limits=httpx.Limits(max_connections=16, max_keepalive_connections=4)
+    )
+
+
+client = get_client()
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Give up waiting for a job after this many seconds
+MAX_WAIT_SECONDS = 600
+
+
+def stream_job(job_id: str, deadline: float) -> dict:
+    """Follow a job over the server-sent events stream until it finishes.
+
+    The stream sends the job status on connect and on every change, so
+    results show up as soon as the job finishes. The server sends
+    keep-alives every few seconds, so the client's read timeout catches
+    a stalled stream; stops early (returning the last status) at
+    `deadline`.
+    """
+    data = {}
+    with client.stream("GET", f"/api/v1/research/{job_id}/events") as events:
+        events.raise_for_status()
+        for line in events.iter_lines():
+            if line.startswith("data:"):
+                data = json.loads(line[5:])
+                st.write(f"Status: {data['status']}")
+                if data["status"] in TERMINAL_STATUSES:
+                    break
+            if time.monotonic() >= deadline:
+                break
+    return data
+
+
+def poll_job(job_id: str, deadline: float) -> dict:
+    """Poll a job's status with backoff (0.5s growing to 5s) until it finishes."""
+    delay = 0.5
+    data = {}
+    while time.monotonic() < deadline:
+        data = client.get(f"/api/v1/research/{job_id}/status").json()
+        st.write(f"Status: {data['status']}")
+        if data["status"] in TERMINAL_STATUSES:
+            break
+        time.sleep(delay)
+        delay = min(delay * 1.5, 5.0)
+    else:
+        data = {"status": "failed", "error_message": "Timed out waiting for the job"}
+    return data
+
+
+def wait_for_job(job_id: str) -> dict:
+    """Wait for a job to finish, preferring the events stream."""
+    deadline = time.monotonic() + MAX_WAIT_SECONDS
+    try:
+        data = stream_job(job_id, deadline)
+    except httpx.HTTPError:
+        # Streaming not supported (e.g. by a proxy in between) or stalled
+        data = {}
+    if data.get("status") in TERMINAL_STATUSES:
+        return data
+    # Polling reports the timeout right away if the deadline has passed
+    return poll_job(job_id, deadline)
+
 st.title("LangChain Research Agent")
 
 query = st.text_input("Enter your research question:")
@@ -10,8 +86,8 @@ include_citations = st.checkbox("Include citations", value=True)
 
 if st.button("Start Research"):
     with st.spinner("Submitting your research job..."):
-        response = requests.post(
-            "http://localhost:8000/api/v1/research",
+        response = client.post(
+            "/api/v1/research",
             json={
                 "query": query,
                 "max_results": max_results,
@@ -22,36 +98,29 @@ if st.button("Start Research"):
         if response.status_code == 200 or response.status_code == 202:
             job_id = response.json()["job_id"]
             st.success(f"Job submitted! Job ID: {job_id}")
-            st.write("Polling for results...")
+            st.write("Waiting for results...")
 
-            while True:
-                status_response = requests.get(
-                    f"http://localhost:8000/api/v1/research/{job_id}/status"
-                )
-                data = status_response.json()
-                st.write(f"Status: {data['status']}")
-                if data["status"] == "completed":
-                    # Fetch full job details (not just status) to get summary/citations
-                    full_response = requests.get(f"http://localhost:8000/api/v1/research/{job_id}")
-                    if full_response.status_code == 200:
-                        full = full_response.json()
-                        st.success("Research complete!")
-                        st.write("### Summary")
-                        st.write(full.get("summary") or full.get("report_data", {}).get("executive_summary", "No summary available."))
-                        if full.get("google_doc_url"):
-                            st.markdown(f"[View Google Doc]({full.get('google_doc_url')})")
-                        if full.get("report_data") and full.get("report_data").get("citations"):
-                            st.write("### Citations")
-                            for i, citation in enumerate(full.get("report_data").get("citations"), 1):
-                                st.write(f"{i}. {citation.get('title', '')} ({citation.get('url', '')})")
-                    else:
-                        st.error("Failed to fetch full job results")
-                    break
-                elif data["status"] == "failed":
-                    st.error(f"Error: {data.get('error_message', 'Unknown error')}")
-                    break
-                time.sleep(3)
+            data = wait_for_job(job_id)
+
+            if data.get("status") == "completed":
+                # Fetch full job details (not just status) to get summary/citations
+                full_response = client.get(f"/api/v1/research/{job_id}")
+                if full_response.status_code == 200:
+                    full = full_response.json()
+                    st.success("Research complete!")
+                    st.write("### Summary")
+                    st.write(full.get("summary") or full.get("report_data", {}).get("executive_summary", "No summary available."))
+                    if full.get("google_doc_url"):
+                        st.markdown(f"[View Google Doc]({full.get('google_doc_url')})")
+                    if full.get("report_data") and full.get("report_data").get("citations"):
+                        st.write("### Citations")
+                        for i, citation in enumerate(full.get("report_data").get("citations"), 1):
+                            st.write(f"{i}. {citation.get('title', '')} ({citation.get('url', '')})")
+                else:
+                    st.error("Failed to fetch full job results")
+            else:
+                st.error(f"Error: {data.get('error_message') or 'Unknown error'}")
         else:
             st.error("Failed to submit research job. Please check your backend server.")
 
-st.info("Make sure your backend is running at http://localhost:8000")
+st.info(f"Make sure your backend is running at {API_URL}")
@@ -1,8 +1,14 @@
 """
 Tests for API endpoints.
 """
+import os
+
 import pytest
 from fastapi.testclient import TestClient
+
+# Keep INFO records out of test runs (read when the logger is set up)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
 from app.main import app
 
 client = TestClient(app)
@@ -73,6 +79,22 @@ def test_list_jobs():
     assert "jobs" in data
 
 
+def test_list_jobs_newest_first():
+    """Test that job listing pages newest jobs first."""
+    payload = {
+        "query": "Test listing order",
+        "max_results": 3
+    }
+    job_id = client.post("/api/v1/research", json=payload).json()["job_id"]
+    
+    response = client.get("/api/v1/jobs?limit=1&offset=0")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] >= 1
+    assert [job["job_id"] for job in data["jobs"]] == [job_id]
+    assert "report_data" not in data["jobs"][0]
+
+
 def test_invalid_research_request():
     """Test creating research job with invalid data."""
     payload = {
@@ -81,4 +103,157 @@ def test_invalid_research_request():
     }
     
     response = client.post("/api/v1/research", json=payload)
-    assert response.status_code == 422  # Validation error
\ No newline at end of file
+    assert response.status_code == 422  # Validation error
+
+
+def test_job_events_stream():
+    """Test streaming job status as server-sent events."""
+    payload = {
+        "query": "Test events query",
+        "max_results": 3
+    }
+    create_response = client.post("/api/v1/research", json=payload)
+    job_id = create_response.json()["job_id"]
+    
+    # Background tasks run before the test client returns, so the job has
+    # already finished and the stream closes after one event.
+    response = client.get(f"/api/v1/research/{job_id}/events")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line for line in response.text.splitlines() if line.startswith("data:")]
+    assert events
+    assert f'"job_id":"{job_id}"' in events[-1]
+
+
+def test_job_events_nonexistent_job():
+    """Test streaming events for a nonexistent job."""
+    response = client.get("/api/v1/research/nonexistent-id/events")
+    assert response.status_code == 404
+
+
+def test_job_status_long_poll():
+    """Test long-polling the job status."""
+    payload = {
+        "query": "Test long poll query",
+        "max_results": 3
+    }
+    create_response = client.post("/api/v1/research", json=payload)
+    job_id = create_response.json()["job_id"]
+    
+    # The job has already finished, so a long-poll returns immediately
+    response = client.get(
+        f"/api/v1/research/{job_id}/status?wait=10",
+        headers={"If-None-Match": '"pending"'}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["job_id"] == job_id
+    assert response.headers["etag"] == f'"{data["status"]}"'
+
+
+def test_duplicate_queries_share_research():
+    """Test that identical queries reuse one research run."""
+    from app.research_agent.state import create_initial_state
+    from app.workers.tasks import inflight, research_key
+    
+    first = create_initial_state("Duplicate query test", "job-1", max_results=3)
+    second = create_initial_state("  duplicate   QUERY test ", "job-2", max_results=3)
+    assert research_key(first) == research_key(second)
+    
+    job_ids = [
+        client.post("/api/v1/research", json={"query": query, "max_results": 3}).json()["job_id"]
+        for query in (first.query, second.query)
+    ]
+    reports = [client.get(f"/api/v1/research/{job_id}").json() for job_id in job_ids]
+    assert reports[0]["status"] == reports[1]["status"] == "completed"
+    assert reports[0]["summary"] == reports[1]["summary"]
+    assert research_key(first) in inflight
+
+
+def test_google_docs_failure_still_completes_job(monkeypatch):
+    """Test that a Google Docs transport error leaves the job completed without a doc."""
+    import sys
+    import types
+    
+    class FailingDocsService:
+        def create_empty_document(self, title):
+            raise OSError("connection timed out")
+        
+        def delete_document(self, document_id):
+            raise AssertionError("no document was created")
+    
+    fake_module = types.ModuleType("app.services.google_docs")
+    fake_module.get_google_docs_service = FailingDocsService
+    monkeypatch.setitem(sys.modules, "app.services.google_docs", fake_module)
+    
+    job_id = client.post(
+        "/api/v1/research", json={"query": "Google Docs failure test", "max_results": 3}
+    ).json()["job_id"]
+    data = client.get(f"/api/v1/research/{job_id}").json()
+    assert data["status"] == "completed"
+    assert data["google_doc_url"] is None
+
+
+def test_duplicate_queries_from_other_users_get_own_documents(monkeypatch):
+    """Test that shared research still gives every job its own doc and workflow."""
+    import asyncio
+    import itertools
+    import sys
+    import types
+    from app.services.job_store import job_store
+    from app.workers import tasks
+    
+    doc_ids = itertools.count()
+    
+    class DocsService:
+        def create_empty_document(self, title):
+            doc_id = f"doc-{next(doc_ids)}"
+            return {"document_id": doc_id, "url": f"https://docs.example/{doc_id}"}
+        
+        async def awrite_report(self, document_id, markdown, title):
+            pass
+    
+    fake_module = types.ModuleType("app.services.google_docs")
+    fake_module.get_google_docs_service = DocsService
+    monkeypatch.setitem(sys.modules, "app.services.google_docs", fake_module)
+    
+    webhooks = []
+    monkeypatch.setattr(
+        tasks.n8n_client, "trigger_workflow_background",
+        lambda **kwargs: webhooks.append(kwargs)
+    )
+    
+    job_ids = [
+        client.post(
+            "/api/v1/research",
+            json={"query": "Cross-user dedup test", "max_results": 3, "user_id": user_id}
+        ).json()["job_id"]
+        for user_id in ("alice", "bob")
+    ]
+    reports = [client.get(f"/api/v1/research/{job_id}").json() for job_id in job_ids]
+    assert reports[0]["status"] == reports[1]["status"] == "completed"
+    assert reports[0]["summary"] == reports[1]["summary"]
+    assert reports[0]["google_doc_url"] != reports[1]["google_doc_url"]
+    
+    assert [hook["job_id"] for hook in webhooks] == job_ids
+    assert [hook["report_data"]["user_id"] for hook in webhooks] == ["alice", "bob"]
+    stored = asyncio.run(job_store.get(job_ids[1]))
+    assert stored["report_data"]["user_id"] == "bob"
+
+
+def test_internal_health_check():
+    """Test the internal health endpoint used by probes."""
+    response = client.get("/internal/health", headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert "access-control-allow-origin" not in response.headers
+    
+    response = client.get("/api/v1/health", headers={"Origin": "http://localhost:3000"})
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+
+
+def test_metrics():
+    """Test LLM cache metrics are exposed."""
+    response = client.get("/api/v1/metrics")
+    assert response.status_code == 200
+    assert set(response.json()["llm_cache"]) == {"hits", "misses", "size"}
@@ -1,9 +1,40 @@
 """
 Unit tests for research workflow graph.
 """
-from app.research_agent.graph import ResearchWorkflow
+import asyncio
+
 
 def test_workflow_runs():
+    from app.research_agent.graph import ResearchWorkflow
     wf = ResearchWorkflow({})
     result = wf.run({"query": "Quantum computing"})
     assert "summary" in result
+
+
+def test_recorded_error_stops_workflow():
+    """Test that a node recording an error skips later nodes."""
+    from app.research_agent.graph import MinimalGraph
+    from app.research_agent.state import create_initial_state
+
+    ran = []
+
+    def record(name, **updates):
+        def node(state):
+            ran.append(name)
+            return updates
+        return node
+
+    class FailingSearchGraph(MinimalGraph):
+        nodes = (
+            ("query_intake", record("query_intake"), frozenset()),
+            ("web_search", record("web_search", error_message="Search error: offline"),
+             frozenset({"query_intake"})),
+            ("draft_report", record("draft_report"), frozenset({"web_search"})),
+        )
+
+    state = create_initial_state("Graph error routing test", "job-graph", max_results=3)
+    result = asyncio.run(FailingSearchGraph().ainvoke(state))
+
+    assert ran == ["query_intake", "web_search"]
+    assert result["report_markdown"].startswith("# Research Report - Error")
+    assert "Search error: offline" in result["report_markdown"]